@@ -0,0 +1,174 @@
+"""End-to-end benchmark of ForumListener.on_thread_create, fully offline.
+
+Pushes synthetic bursts of new forum threads through the real cog using the
+stand-in Discord objects from fakes.py. REST calls go through a fake HTTP
+layer with configurable latency and per-route rate limits, so batching,
+starter-message handling and 429 back-off all behave as they would live.
+
+Reports events/sec, p50/p99 end-to-end latency per event and memory growth
+over the run.
+
+Usage:
+    python benchmarks/bench_listener.py [--events N] [--burst N] [--forums N]
+        [--latency MS] [--random-429 P] [--starter gateway|rest|cached]
+        [--low-memory] [--authors N]
+"""
+import argparse
+import asyncio
+import random
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fakes import (  # noqa: E402
+    FakeBot, FakeForumChannel, FakeGuild, FakeHTTP, FakeTag, FakeTextChannel, FakeUser, make_thread, next_id
+)
+from utils import storage  # noqa: E402
+
+GUILD_ID = 1
+NOTIFICATION_CHANNEL_ID = 2
+
+
+def percentile(values, fraction):
+    """Return the value at `fraction` (0-1) of the sorted values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB (Linux reports KB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def setup_world(args, http):
+    """Create the bot, guild, forums and notification channel; write settings."""
+    bot = FakeBot(http, low_memory=args.low_memory)
+    guild = FakeGuild(GUILD_ID, http)
+    bot.add_channel(FakeTextChannel(NOTIFICATION_CHANNEL_ID, guild, http))
+
+    forums = []
+    for i in range(args.forums):
+        tags = [FakeTag(next_id(), f"tag-{j}") for j in range(5)]
+        forums.append(bot.add_channel(FakeForumChannel(next_id(), guild, f"forum-{i}", tags)))
+
+    settings = storage.load_settings()
+    guild_settings = storage.get_guild_settings(settings, GUILD_ID)
+    guild_settings['notification_channel_id'] = NOTIFICATION_CHANNEL_ID
+    guild_settings['monitored_forums'] = [forum.id for forum in forums]
+    guild_settings['shrink_delay'] = args.shrink_delay
+    storage.save_settings(settings)
+    return bot, forums
+
+
+async def run(args):
+    from cogs import forum_listener
+
+    forum_listener.STARTER_MESSAGE_TIMEOUT = args.starter_timeout
+    http = FakeHTTP(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        rate_limit=None if args.no_rate_limit else (5, 5.0),
+        random_429=args.random_429
+    )
+    bot, forums = setup_world(args, http)
+    listener = forum_listener.ForumListener(bot)
+    await listener.cog_load()
+
+    latencies = []
+    authors = [FakeUser(next_id()) for _ in range(args.authors)]
+
+    async def handle(thread):
+        start = time.perf_counter()
+        await listener.on_thread_create(thread)
+        latencies.append(time.perf_counter() - start)
+
+    def deliver_starter(thread):
+        asyncio.get_running_loop().create_task(listener.on_message(thread.first_message))
+
+    tracemalloc.start()
+    memory_before, _ = tracemalloc.get_traced_memory()
+    rss_before = max_rss_mb()
+    loop = asyncio.get_running_loop()
+    tasks = []
+    start = time.perf_counter()
+
+    sent = 0
+    while sent < args.events:
+        for _ in range(min(args.burst, args.events - sent)):
+            owner = random.choice(authors) if authors else None
+            thread = make_thread(random.choice(forums), http, forums[0].available_tags, args.content_length, owner)
+            if args.low_memory:
+                # Without the member cache only the owner's ID is known
+                thread.owner = None
+            if args.starter == 'cached':
+                thread.starter_message = thread.first_message
+            elif args.starter == 'gateway':
+                # MESSAGE_CREATE usually arrives just after THREAD_CREATE
+                loop.call_later(args.gateway_delay / 1000, deliver_starter, thread)
+            # Like discord.py, each event gets its own task
+            tasks.append(loop.create_task(handle(thread)))
+            sent += 1
+        await asyncio.sleep(args.interval / 1000)
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    memory_after, memory_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    await listener.cog_unload()
+    await storage.flush_storage()
+
+    latencies.sort()
+    stats = listener.dispatcher.stats
+    print(f"events          {args.events:>10,} in {elapsed:.2f}s ({args.events / elapsed:,.0f} events/sec)")
+    print(f"latency p50     {percentile(latencies, 0.50) * 1000:>10.1f} ms")
+    print(f"latency p99     {percentile(latencies, 0.99) * 1000:>10.1f} ms")
+    print(f"latency max     {latencies[-1] * 1000:>10.1f} ms")
+    print(f"messages sent   {stats['messages']:>10,} ({stats['messages_saved']:,} saved by batching, "
+          f"{stats['failed']:,} failed)")
+    print(f"http requests   {http.stats['requests']:>10,} ({http.stats['rate_limited']:,} rate limited)")
+    print(f"starter msgs    {listener.starter_stats}")
+    print(f"load shed       {listener.shed_stats}")
+    if args.low_memory:
+        print(f"owner lookups   {bot.owner_resolver.stats}")
+    print(f"memory growth   {(memory_after - memory_before) / 1024:>10,.0f} KB "
+          f"(peak {(memory_peak - memory_before) / 1024:,.0f} KB traced)")
+    print(f"max rss         {max_rss_mb():>10.1f} MB (was {rss_before:.1f} MB)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--events', type=int, default=500, help="thread create events to send")
+    parser.add_argument('--burst', type=int, default=50, help="events per burst")
+    parser.add_argument('--interval', type=float, default=100, help="ms between bursts")
+    parser.add_argument('--forums', type=int, default=5, help="monitored forums")
+    parser.add_argument('--latency', type=float, default=50, help="ms per fake REST request")
+    parser.add_argument('--jitter', type=float, default=20, help="max extra ms per REST request")
+    parser.add_argument('--random-429', type=float, default=0.0, help="probability of a 429 per request")
+    parser.add_argument('--no-rate-limit', action='store_true', help="disable per-route rate limits")
+    parser.add_argument('--starter', choices=('gateway', 'rest', 'cached'), default='gateway',
+                        help="how starter messages become available")
+    parser.add_argument('--gateway-delay', type=float, default=20, help="ms until MESSAGE_CREATE arrives")
+    parser.add_argument('--starter-timeout', type=float, default=0.5,
+                        help="seconds to wait for MESSAGE_CREATE before fetching")
+    parser.add_argument('--content-length', type=int, default=300, help="starter message length")
+    parser.add_argument('--shrink-delay', type=int, default=0, help="seconds until notifications shrink")
+    parser.add_argument('--low-memory', action='store_true', help="fetch thread owners as in LOW_MEMORY mode")
+    parser.add_argument('--authors', type=int, default=0, help="distinct post authors (0: a new one per post)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.SETTINGS_FILE = Path(tmp) / "settings.json"
+        storage.DATABASE_FILE = Path(tmp) / "settings.db"
+        asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Micro-benchmark: settings lookups per second, cached vs. uncached.
+
+Simulates the monitored-forum check done by ``on_thread_create`` for every
+thread event, once through the in-memory cache and once by re-reading
+``settings.json`` each time (the old behaviour).
+
+Usage:
+    python benchmarks/bench_settings.py [events]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import storage  # noqa: E402
+
+
+def run(label, lookup, events):
+    """Time `events` monitored-forum checks using `lookup` to get settings."""
+    start = time.perf_counter()
+    for i in range(events):
+        settings = lookup()
+        _ = i in settings['guilds']['1']['monitored_forums']
+    elapsed = time.perf_counter() - start
+    print(f"{label:<10} {events / elapsed:>14,.0f} events/sec  ({elapsed * 1000:.1f} ms)")
+
+
+def main():
+    events = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.SETTINGS_FILE = Path(tmp) / "settings.json"
+        settings = storage.load_settings()
+        storage.get_guild_settings(settings, 1)['monitored_forums'] = list(range(1000, 1050))
+        storage.save_settings(settings)
+
+        run("uncached", storage.get_backend().load, events)
+        run("cached", storage.load_settings, events)
+        run("mtime", lambda: storage.load_settings(revalidate=True), events)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+"""Stand-in Discord objects for driving the cogs without a gateway connection.
+
+Only the attributes and coroutines the cogs actually use are implemented.
+Every REST-like call (send, edit, fetch) goes through FakeHTTP, which adds
+latency and emulates Discord's per-route rate limits: a request over the
+limit gets a "429" and is retried after the bucket resets, the same way
+discord.py handles it.
+"""
+import asyncio
+import itertools
+import random
+import time
+
+import discord
+
+# Discord's per-channel message limit is roughly 5 messages per 5 seconds
+DEFAULT_RATE_LIMIT = (5, 5.0)
+
+_ids = itertools.count(1)
+
+
+def next_id():
+    """Return a snowflake-like ID for the current time, unique per call."""
+    return discord.utils.time_snowflake(discord.utils.utcnow()) + next(_ids)
+
+
+class FakeHTTP:
+    """Fake REST layer with configurable latency and 429 responses."""
+
+    def __init__(self, latency=0.05, jitter=0.0, rate_limit=DEFAULT_RATE_LIMIT, random_429=0.0,
+                 retry_after=1.0):
+        """
+        Args:
+            latency: Seconds each request takes.
+            jitter: Extra random latency of up to this many seconds.
+            rate_limit: (requests, per_seconds) allowed per route, or None.
+            random_429: Probability of an unprompted 429 on any request.
+            retry_after: Seconds to wait after an unprompted 429.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit = rate_limit
+        self.random_429 = random_429
+        self.retry_after = retry_after
+        # route -> [window_start, count]
+        self._buckets = {}
+        self.stats = {'requests': 0, 'rate_limited': 0}
+
+    def _retry_after(self, route):
+        """Return seconds to wait if this request is rate limited, else None."""
+        if self.random_429 and random.random() < self.random_429:
+            return self.retry_after
+        if self.rate_limit is None:
+            return None
+
+        limit, period = self.rate_limit
+        now = time.monotonic()
+        bucket = self._buckets.get(route)
+        if bucket is None or now - bucket[0] >= period:
+            bucket = self._buckets[route] = [now, 0]
+        if bucket[1] >= limit:
+            return bucket[0] + period - now
+        bucket[1] += 1
+        return None
+
+    async def request(self, route):
+        """Perform a fake request on a route such as ('send', channel_id)."""
+        while True:
+            self.stats['requests'] += 1
+            await asyncio.sleep(self.latency + (random.random() * self.jitter if self.jitter else 0))
+            retry_after = self._retry_after(route)
+            if retry_after is None:
+                return
+            self.stats['rate_limited'] += 1
+            await asyncio.sleep(retry_after)
+
+
+class FakeAsset:
+    def __init__(self, url):
+        self.url = url
+
+
+class FakeUser:
+    def __init__(self, user_id, name="user"):
+        self.id = user_id
+        self.name = name
+        self.mention = f"<@{user_id}>"
+        self.display_avatar = FakeAsset(f"https://cdn.discordapp.com/embed/avatars/{user_id % 5}.png")
+
+
+class FakeGuild:
+    def __init__(self, guild_id, http=None):
+        self.id = guild_id
+        self.http = http
+
+    async def fetch_member(self, user_id):
+        await self.http.request(('member', self.id))
+        return FakeUser(user_id)
+
+
+class FakeTag:
+    def __init__(self, tag_id, name):
+        self.id = tag_id
+        self.name = name
+
+
+class FakeAttachment:
+    def __init__(self, url, content_type):
+        self.url = url
+        self.content_type = content_type
+
+
+class FakeForumChannel:
+    def __init__(self, forum_id, guild, name="forum", tags=()):
+        self.id = forum_id
+        self.guild = guild
+        self.name = name
+        self.available_tags = list(tags)
+        self.mention = f"<#{forum_id}>"
+
+
+class FakeMessage:
+    def __init__(self, message_id, channel, content="", attachments=()):
+        self.id = message_id
+        self.channel = channel
+        self.guild = channel.guild
+        self.content = content
+        self.attachments = list(attachments)
+
+    async def edit(self, **kwargs):
+        await self.channel.http.request(('edit', self.channel.id))
+        return self
+
+
+class FakeTextChannel:
+    def __init__(self, channel_id, guild, http, name="notifications"):
+        self.id = channel_id
+        self.guild = guild
+        self.http = http
+        self.name = name
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, content=None, *, embed=None, embeds=None, view=None, **kwargs):
+        await self.http.request(('send', self.id))
+        self.sent += 1
+        return FakeMessage(next_id(), self)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(message_id, self)
+
+
+class FakeThread:
+    def __init__(self, thread_id, forum, owner, name, http, content="", applied_tags=(), attachments=()):
+        self.id = thread_id
+        self.name = name
+        self.guild = forum.guild
+        self.parent = forum
+        self.parent_id = forum.id
+        self.owner = owner
+        self.owner_id = owner.id
+        self.applied_tags = list(applied_tags)
+        self.created_at = discord.utils.utcnow()
+        self.jump_url = f"https://discord.com/channels/{forum.guild.id}/{thread_id}"
+        self.http = http
+        # Usually not cached yet when the thread create event arrives
+        self.starter_message = None
+        self.first_message = FakeMessage(thread_id, self, content, attachments)
+
+    async def fetch_message(self, message_id):
+        await self.http.request(('fetch', self.id))
+        return self.first_message
+
+
+class FakeBot:
+    """The parts of ForumNotifierBot the cogs use."""
+
+    def __init__(self, http, low_memory=False):
+        from utils.channels import ChannelResolver
+        from utils.members import OwnerResolver
+
+        self.http = http
+        self.latency = 0.04
+        self.channels = {}
+        self.channel_resolver = ChannelResolver(self)
+        # In low-memory mode thread owners aren't cached and are fetched instead
+        self.owner_resolver = OwnerResolver(self, fetch=low_memory)
+
+    def add_channel(self, channel):
+        self.channels[channel.id] = channel
+        return channel
+
+    def get_channel(self, channel_id):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id):
+        await self.http.request(('channel', channel_id))
+        channel = self.channels.get(channel_id)
+        if channel is None:
+            raise discord.NotFound(_FakeResponse(404), 'Unknown Channel')
+        return channel
+
+    def get_partial_messageable(self, channel_id):
+        return self.channels[channel_id]
+
+    async def wait_until_ready(self):
+        return
+
+
+class _FakeResponse:
+    """Minimal response object for constructing discord.HTTPException."""
+
+    def __init__(self, status, reason="Fake"):
+        self.status = status
+        self.reason = reason
+
+
+def make_thread(forum, http, tags=(), content_length=200, owner=None):
+    """Create a new thread in a forum with a starter message of the given length."""
+    thread_id = next_id()
+    owner = owner or FakeUser(next_id())
+    content = ("lorem ipsum dolor sit amet " * (content_length // 27 + 1))[:content_length]
+    applied = random.sample(tags, k=min(len(tags), 2)) if tags else []
+    return FakeThread(thread_id, forum, owner, f"Post {thread_id % 100000}", http, content, applied)
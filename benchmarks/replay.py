@@ -0,0 +1,220 @@
+"""Replay a recorded gateway capture into ForumListener, fully offline.
+
+Captures are written by the bot when RECORD_EVENTS is set (see
+utils/recorder.py). Events are fed to the cog at their recorded pace scaled by
+--speed (1 = real time, 10 = ten times faster, 0 = as fast as possible), with
+REST calls going to the fake HTTP layer from fakes.py.
+
+Threads, forums and messages are rebuilt from the payloads; only what the
+capture contains is known, e.g. forum names come from CHANNEL_UPDATE events.
+Slash command interactions aren't recorded, so ConfigCommands is exercised
+only through the settings it would have written (pass --settings).
+
+Usage:
+    python benchmarks/replay.py capture.jsonl [--speed N] [--settings settings.json]
+        [--latency MS] [--random-429 P]
+"""
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_listener import max_rss_mb, percentile  # noqa: E402
+from fakes import (  # noqa: E402
+    FakeAttachment, FakeBot, FakeForumChannel, FakeGuild, FakeHTTP, FakeMessage, FakeTag,
+    FakeTextChannel, FakeThread, FakeUser, next_id
+)
+from utils import storage  # noqa: E402
+from utils.recorder import read_capture  # noqa: E402
+
+
+class ReplayWorld:
+    """Builds fake Discord objects from captured payloads as they are replayed."""
+
+    def __init__(self, bot, http):
+        self.bot = bot
+        self.http = http
+        self.guilds = {}
+        self.threads = {}
+
+    def guild(self, guild_id):
+        guild = self.guilds.get(guild_id)
+        if guild is None:
+            guild = self.guilds[guild_id] = FakeGuild(guild_id)
+        return guild
+
+    def forum(self, forum_id, guild_id):
+        forum = self.bot.get_channel(forum_id)
+        if forum is None:
+            forum = self.bot.add_channel(FakeForumChannel(forum_id, self.guild(guild_id), f"forum-{forum_id}"))
+        return forum
+
+    def update_channel(self, data):
+        """Apply a CHANNEL_UPDATE payload. Returns (before, after) for forums, else None."""
+        if 'available_tags' not in data:
+            return None
+        guild_id = int(data['guild_id'])
+        after = FakeForumChannel(
+            int(data['id']), self.guild(guild_id), data.get('name', f"forum-{data['id']}"),
+            [FakeTag(int(tag['id']), tag['name']) for tag in data['available_tags']]
+        )
+        before = self.bot.channels.get(after.id)
+        self.bot.add_channel(after)
+        return before or after, after
+
+    def create_thread(self, data):
+        """Build a thread from a THREAD_CREATE payload."""
+        forum = self.forum(int(data['parent_id']), int(data['guild_id']))
+        owner_id = int(data.get('owner_id') or next_id())
+        tags = {tag.id: tag for tag in forum.available_tags}
+        applied_tags = [
+            tags.get(int(tag_id)) or FakeTag(int(tag_id), tag_id) for tag_id in data.get('applied_tags', [])
+        ]
+        thread = FakeThread(
+            int(data['id']), forum, FakeUser(owner_id), data.get('name', ''), self.http,
+            applied_tags=applied_tags
+        )
+        self.threads[thread.id] = thread
+        return thread
+
+    def create_message(self, data):
+        """Build a starter message from a MESSAGE_CREATE payload."""
+        channel_id = int(data['channel_id'])
+        # Like discord.py, a message for an uncached thread gets a partial channel
+        channel = self.threads.get(channel_id) or SimpleNamespace(
+            id=channel_id, guild=self.guild(int(data.get('guild_id') or 0))
+        )
+        attachments = [
+            FakeAttachment(attachment['url'], attachment.get('content_type'))
+            for attachment in data.get('attachments', [])
+        ]
+        message = FakeMessage(int(data['id']), channel, data.get('content', ''), attachments)
+        if channel_id in self.threads:
+            # Later REST fetches return the real content
+            self.threads[channel_id].first_message = message
+        return message
+
+
+def auto_settings(events, notification_channel_id):
+    """Monitor every forum seen in the capture, notifying one fake channel per guild."""
+    settings = storage.load_settings()
+    for _, event, data in events:
+        if event == 'THREAD_CREATE' and data.get('parent_id'):
+            guild_settings = storage.get_guild_settings(settings, int(data['guild_id']))
+            guild_settings['notification_channel_id'] = notification_channel_id
+            forum_id = int(data['parent_id'])
+            if forum_id not in guild_settings['monitored_forums']:
+                guild_settings['monitored_forums'].append(forum_id)
+    storage.save_settings(settings)
+    return settings
+
+
+async def replay(args):
+    from cogs import forum_listener
+
+    events = list(read_capture(args.capture))
+    if not events:
+        print(f"No events in {args.capture}")
+        return
+
+    http = FakeHTTP(
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        rate_limit=None if args.no_rate_limit else (5, 5.0),
+        random_429=args.random_429
+    )
+    bot = FakeBot(http)
+    world = ReplayWorld(bot, http)
+
+    if args.settings:
+        settings = storage.load_settings()
+    else:
+        settings = auto_settings(events, next_id())
+    # Every configured notification/error channel exists and accepts messages
+    for guild_key, guild_settings in settings['guilds'].items():
+        for key in ('notification_channel_id', 'error_channel_id'):
+            channel_id = guild_settings[key]
+            if channel_id and bot.get_channel(channel_id) is None:
+                bot.add_channel(FakeTextChannel(channel_id, world.guild(int(guild_key)), http))
+
+    listener = forum_listener.ForumListener(bot)
+    await listener.cog_load()
+
+    latencies = []
+    counts = {'THREAD_CREATE': 0, 'MESSAGE_CREATE': 0, 'CHANNEL_UPDATE': 0}
+
+    async def handle(thread):
+        start = time.perf_counter()
+        await listener.on_thread_create(thread)
+        latencies.append(time.perf_counter() - start)
+
+    loop = asyncio.get_running_loop()
+    tasks = []
+    start = time.perf_counter()
+    for offset, event, data in events:
+        if args.speed > 0:
+            delay = offset / args.speed - (time.perf_counter() - start)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        counts[event] = counts.get(event, 0) + 1
+
+        if event == 'THREAD_CREATE':
+            # discord.py only dispatches thread_create for new threads
+            if data.get('newly_created') and data.get('parent_id'):
+                tasks.append(loop.create_task(handle(world.create_thread(data))))
+        elif event == 'MESSAGE_CREATE':
+            tasks.append(loop.create_task(listener.on_message(world.create_message(data))))
+        elif event == 'CHANNEL_UPDATE':
+            changed = world.update_channel(data)
+            if changed:
+                tasks.append(loop.create_task(listener.on_guild_channel_update(*changed)))
+
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await listener.cog_unload()
+    await storage.flush_storage()
+
+    recorded = events[-1][0]
+    latencies.sort()
+    stats = listener.dispatcher.stats
+    print(f"replayed        {len(events):>10,} events {counts} in {elapsed:.2f}s "
+          f"(recorded over {recorded:.2f}s, {recorded / elapsed if elapsed else 0:.1f}x)")
+    print(f"threads         {len(latencies):>10,} ({len(latencies) / elapsed:,.0f}/sec)")
+    if latencies:
+        print(f"latency p50     {percentile(latencies, 0.50) * 1000:>10.1f} ms")
+        print(f"latency p99     {percentile(latencies, 0.99) * 1000:>10.1f} ms")
+    print(f"notifications   {stats['notifications']:>10,} in {stats['messages']:,} messages "
+          f"({stats['failed']:,} failed)")
+    print(f"http requests   {http.stats['requests']:>10,} ({http.stats['rate_limited']:,} rate limited)")
+    print(f"starter msgs    {listener.starter_stats}")
+    print(f"max rss         {max_rss_mb():>10.1f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('capture', help="capture file written with RECORD_EVENTS")
+    parser.add_argument('--speed', type=float, default=1.0, help="replay speed multiplier, 0 for max")
+    parser.add_argument('--settings', help="settings.json to use instead of monitoring every forum seen")
+    parser.add_argument('--latency', type=float, default=50, help="ms per fake REST request")
+    parser.add_argument('--jitter', type=float, default=20, help="max extra ms per REST request")
+    parser.add_argument('--random-429', type=float, default=0.0, help="probability of a 429 per request")
+    parser.add_argument('--no-rate-limit', action='store_true', help="disable per-route rate limits")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        storage.SETTINGS_FILE = Path(tmp) / "settings.json"
+        storage.DATABASE_FILE = Path(tmp) / "settings.db"
+        if args.settings:
+            # Never write to the real settings file
+            shutil.copy(args.settings, storage.SETTINGS_FILE)
+        asyncio.run(replay(args))
+
+
+if __name__ == '__main__':
+    main()
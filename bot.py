@@ -1,46 +1,270 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
+import hashlib
+import json
+import logging
 import os
+import sys
+import time
 from dotenv import load_dotenv
+from utils.channels import ChannelResolver
+from utils.logs import parse_sample_rates, setup_logging
+from utils.members import OwnerResolver
+from utils.metrics import start_metrics_server
+from utils.recorder import EventRecorder
+from utils.sharding import GuildPartition, parse_shard_ids
+from utils.storage import (
+    STORAGE_BACKEND, claim_legacy_settings, flush_storage, load_records, load_settings, put_record
+)
+from utils.webhooks import WebhookSender
+
+log = logging.getLogger('forum_notifier')
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
-SERVER_ID = int(os.getenv('SERVER_ID'))
+# Optional: guild that settings from before multi-guild support belong to
+SERVER_ID = int(os.getenv('SERVER_ID')) if os.getenv('SERVER_ID') else None
+
 
+# Don't cache guild members or messages; thread owners are fetched when needed
+LOW_MEMORY = os.getenv('LOW_MEMORY', 'false').lower() in ('1', 'true', 'yes')
+# Thread owners kept, and for how many seconds, when they are fetched
+OWNER_CACHE_SIZE = int(os.getenv('OWNER_CACHE_SIZE', '1000'))
+OWNER_CACHE_TTL = float(os.getenv('OWNER_CACHE_TTL', '600'))
 
 # Bot setup with necessary intents
 intents = discord.Intents.default()
-intents.members = True  # Fixed: needed for thread.owner mention
+intents.members = not LOW_MEMORY  # Fixed: needed for thread.owner mention
 intents.message_content = True  # Required to read message content for previews
 
+# Member chunking and the message cache dominate memory use in large guilds
+LOW_MEMORY_OPTIONS = {
+    'chunk_guilds_at_startup': False,
+    'member_cache_flags': discord.MemberCacheFlags.none(),
+    'max_messages': None,
+} if LOW_MEMORY else {}
+
+# Seconds to remember that a configured channel is missing or forbidden
+CHANNEL_NEGATIVE_TTL = float(os.getenv('CHANNEL_NEGATIVE_TTL', '300'))
+
+# Optional Prometheus metrics endpoint, e.g. METRICS_PORT=9108
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT')) if os.getenv('METRICS_PORT') else None
+
+# Send notifications through a webhook per channel instead of the bot token
+WEBHOOK_DELIVERY = os.getenv('WEBHOOK_DELIVERY', 'false').lower() in ('1', 'true', 'yes')
+# Max simultaneous connections of the session shared by all webhooks
+WEBHOOK_POOL_SIZE = int(os.getenv('WEBHOOK_POOL_SIZE', '20'))
+
+# Log level, "json" (JSON lines) or "text" output, and the fraction of
+# high-volume info/debug events kept, e.g. LOG_SAMPLE_RATES=thread_notified=0.1
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'json').lower()
+LOG_SAMPLE_RATES = parse_sample_rates(os.getenv('LOG_SAMPLE_RATES', ''))
+
+# Optional: append raw thread/message/channel events to this file for replay
+RECORD_EVENTS = os.getenv('RECORD_EVENTS')
+
+# Optional: total shard count (default: Discord's recommendation) and the
+# shards run by this process, e.g. SHARD_IDS=0-3, to split shards across processes
+SHARD_COUNT = int(os.getenv('SHARD_COUNT')) if os.getenv('SHARD_COUNT') else None
+SHARD_IDS = parse_shard_ids(os.getenv('SHARD_IDS')) if os.getenv('SHARD_IDS') else None
+
+# Slash commands are synced only when the command tree changed since the last
+# sync. COMMAND_SYNC_SCOPE=guild syncs to SERVER_ID instead of globally, which
+# applies instantly (for development); FORCE_COMMAND_SYNC=true always syncs.
+COMMAND_SYNC_SCOPE = os.getenv('COMMAND_SYNC_SCOPE', 'global').lower()
+FORCE_COMMAND_SYNC = os.getenv('FORCE_COMMAND_SYNC', 'false').lower() in ('1', 'true', 'yes')
+# Record kind for the fingerprint of the last synced command tree, per scope
+COMMAND_SYNC_RECORD_KIND = "command_sync"
+
+# Seconds between checks for settings edited outside the bot (0 to disable)
+SETTINGS_WATCH_INTERVAL = float(os.getenv('SETTINGS_WATCH_INTERVAL', '5'))
 
-class ForumNotifierBot(commands.Bot):
+# Extensions loaded at startup and reloaded by /forum reload
+COGS = ['cogs.forum_listener', 'cogs.config_commands']
+
+
+class ForumNotifierBot(commands.AutoShardedBot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
+        # Raw gateway payloads are only dispatched with debug events enabled
+        super().__init__(
+            command_prefix="!",
+            intents=intents,
+            enable_debug_events=bool(RECORD_EVENTS),
+            shard_count=SHARD_COUNT,
+            shard_ids=SHARD_IDS,
+            **LOW_MEMORY_OPTIONS
+        )
+        # Guilds whose background work (shrinks, digests, catch-up) this process runs
+        self.partition = GuildPartition(SHARD_IDS, SHARD_COUNT)
+        self.started_at = time.perf_counter()
+        # Shared by the cogs to look up notification and error channels
+        self.channel_resolver = ChannelResolver(self, negative_ttl=CHANNEL_NEGATIVE_TTL)
+        self.owner_resolver = OwnerResolver(self, fetch=LOW_MEMORY, max_entries=OWNER_CACHE_SIZE, ttl=OWNER_CACHE_TTL)
+        self.metrics_runner = None
+        self.recorder = EventRecorder(RECORD_EVENTS) if RECORD_EVENTS else None
+        self.webhook_sender = WebhookSender(self, pool_size=WEBHOOK_POOL_SIZE) if WEBHOOK_DELIVERY else None
+        # While cogs are reloaded: cog name -> live state handed from the old instance to the new one
+        self.handover = None
 
     async def setup_hook(self):
         """Called before on_ready. Load cogs and sync commands here."""
+        if self.webhook_sender:
+            await self.webhook_sender.start()
+
         # Load cogs
-        cogs = ['cogs.forum_listener', 'cogs.config_commands']
-        for cog in cogs:
+        for cog in COGS:
             try:
                 await self.load_extension(cog)
-                print(f'Loaded {cog}')
+                log.info('Loaded %s', cog)
+            except Exception:
+                log.exception('Failed to load %s', cog)
+
+        if SETTINGS_WATCH_INTERVAL > 0:
+            self.settings_watcher.start()
+
+        # Start metrics endpoint
+        if METRICS_PORT:
+            try:
+                self.metrics_runner = await start_metrics_server(METRICS_HOST, METRICS_PORT)
+                log.info('Serving metrics on http://%s:%d/metrics', METRICS_HOST, METRICS_PORT)
             except Exception as e:
-                print(f'Failed to load {cog}: {e}')
+                log.error('Failed to start metrics server: %s', e)
+
+        # Sync slash commands (the tree is global, so one process is enough)
+        if self.partition.owns(None):
+            await self.sync_commands(force=FORCE_COMMAND_SYNC)
+        log.info('Setup finished', extra={'startup_s': round(time.perf_counter() - self.started_at, 2)})
+
+    def command_tree_fingerprint(self, guild=None) -> str:
+        """Return a hash of the command payload a sync would upload."""
+        payload = [command.to_dict(self.tree) for command in self.tree.get_commands(guild=guild)]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    async def sync_commands(self, force=False):
+        """Sync slash commands with Discord if the command tree changed since the last sync.
 
-        # Sync slash commands
+        Syncing is a heavily rate-limited API call, so it's skipped when the
+        fingerprint of the tree matches the one persisted after the last sync.
+        """
+        guild = None
+        if COMMAND_SYNC_SCOPE == 'guild':
+            if not SERVER_ID:
+                log.warning('COMMAND_SYNC_SCOPE=guild needs SERVER_ID, syncing globally')
+            else:
+                guild = discord.Object(SERVER_ID)
+                self.tree.copy_global_to(guild=guild)
+
+        # Per application, so switching tokens to another bot still syncs
+        key = f'{self.application_id}:{guild.id if guild else "global"}'
+        fingerprint = self.command_tree_fingerprint(guild)
+        if not force and load_records(COMMAND_SYNC_RECORD_KIND).get(key) == fingerprint:
+            log.info('Commands unchanged since last sync, skipping sync')
+            return
+
+        start = time.perf_counter()
         try:
-            synced = await self.tree.sync()
-            print(f'Synced {len(synced)} command(s)')
+            synced = await self.tree.sync(guild=guild)
         except Exception as e:
-            print(f'Failed to sync commands: {e}')
+            log.error('Failed to sync commands: %s', e)
+            return
+        put_record(COMMAND_SYNC_RECORD_KIND, key, fingerprint)
+        log.info('Synced %d command(s)', len(synced), extra={
+            'guild_id': guild.id if guild else None, 'sync_s': round(time.perf_counter() - start, 2)
+        })
+
+    async def reload_cogs(self) -> list:
+        """Reload the cogs' code without reconnecting to the gateway.
+
+        Cogs hand their live state (queued notifications, shrink timers,
+        pending edits...) to the reloaded instance through `self.handover`
+        instead of shutting it down. A cog that fails to load keeps running
+        its previous code, which discord.py restores.
+
+        Returns:
+            (extension, error) pairs of the cogs that failed to reload.
+        """
+        failed = []
+        for extension in COGS:
+            self.handover = {}
+            try:
+                start = time.perf_counter()
+                await self.reload_extension(extension)
+                log.info('Reloaded %s', extension, extra={'reload_s': round(time.perf_counter() - start, 3)})
+            except Exception as e:
+                log.exception('Failed to reload %s', extension)
+                failed.append((extension, e))
+            finally:
+                if self.handover:
+                    log.warning('State of %s was not taken over after reloading', ', '.join(self.handover))
+                self.handover = None
+
+        # New or changed commands need a sync; unchanged ones are skipped
+        if self.partition.owns(None):
+            await self.sync_commands()
+        return failed
+
+    @tasks.loop(seconds=SETTINGS_WATCH_INTERVAL)
+    async def settings_watcher(self):
+        """Pick up settings edited by hand or by another process."""
+        load_settings(revalidate=True)
 
     async def on_ready(self):
         """Called when bot is ready and connected."""
-        print(f'Logged in as {self.user} (ID: {self.user.id})')
-        print('------')
+        log.info('Logged in as %s (ID: %s)', self.user, self.user.id, extra={
+            'guilds': len(self.guilds),
+            'shards': sorted(self.shards),
+            'shard_count': self.shard_count,
+            'ready_s': round(time.perf_counter() - self.started_at, 2),
+            'peak_rss_mb': round(max_rss_mb(), 1),
+            'low_memory': LOW_MEMORY,
+        })
+
+        # Assign pre-multi-guild settings to SERVER_ID, or to the only guild
+        if SERVER_ID:
+            if self.partition.owns(SERVER_ID):
+                claim_legacy_settings(SERVER_ID)
+        elif len(self.guilds) == 1 and SHARD_IDS is None:
+            claim_legacy_settings(self.guilds[0].id)
+
+    async def on_socket_raw_receive(self, msg):
+        """Write gateway events to the capture file when recording."""
+        if self.recorder is None:
+            return
+        try:
+            self.recorder.record(msg)
+        except Exception as e:
+            log.warning('Failed to record gateway event: %s', e)
+
+    async def close(self):
+        """Unload the cogs, then write pending settings and records before exiting."""
+        self.settings_watcher.cancel()
+        # Unloads the cogs first, which send queued notifications and record
+        # the shrinks, notified posts and index entries that go with them
+        await super().close()
+        try:
+            await flush_storage()
+        except Exception:
+            log.exception('Failed to flush storage')
+        if self.webhook_sender:
+            await self.webhook_sender.close()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        if self.recorder:
+            self.recorder.close()
+
+
+def max_rss_mb():
+    """Peak resident set size of this process in MB, or 0 where unsupported."""
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KB elsewhere
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
 
 
 bot = ForumNotifierBot()
@@ -48,11 +272,17 @@ bot = ForumNotifierBot()
 
 def main():
     """Main entry point."""
+    setup_logging(LOG_LEVEL, LOG_FORMAT, LOG_SAMPLE_RATES)
     if not TOKEN:
-        print("Error: DISCORD_TOKEN not found in .env file")
+        log.error("DISCORD_TOKEN not found in .env file")
+        return
+    if SHARD_IDS is not None and STORAGE_BACKEND != 'sqlite':
+        # Each process caches and rewrites the whole JSON file
+        log.error("Running a shard range needs STORAGE_BACKEND=sqlite, shared by all processes")
         return
 
-    bot.run(TOKEN)
+    # Logging is already set up; discord.py's own handler would bypass the queue
+    bot.run(TOKEN, log_handler=None)
 
 
 if __name__ == '__main__':
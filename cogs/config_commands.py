@@ -1,9 +1,15 @@
+from typing import Optional
+
 import discord
 from discord import app_commands
 from discord.ext import commands
-from utils.storage import load_settings, save_settings
+from utils.storage import find_guild_settings, get_guild_settings, load_settings, save_settings
+
+# Max routing rules per guild
+MAX_ROUTES = 50
 
 
+@app_commands.guild_only()
 class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifier configuration"):
     """Slash commands for configuring the forum notifier bot."""
 
@@ -17,15 +23,16 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
     async def monitor(self, interaction: discord.Interaction, channel: discord.ForumChannel):
         """Add a forum to the watch list."""
         settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
 
-        if channel.id in settings['monitored_forums']:
+        if channel.id in guild_settings['monitored_forums']:
             await interaction.response.send_message(
                 f"❌ {channel.mention} is already being monitored.",
                 ephemeral=True
             )
             return
 
-        settings['monitored_forums'].append(channel.id)
+        guild_settings['monitored_forums'].append(channel.id)
         save_settings(settings)
 
         await interaction.response.send_message(
@@ -39,15 +46,21 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
     async def unmonitor(self, interaction: discord.Interaction, channel: discord.ForumChannel):
         """Remove a forum from monitoring."""
         settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
 
-        if channel.id not in settings['monitored_forums']:
+        if channel.id not in guild_settings['monitored_forums']:
             await interaction.response.send_message(
                 f"❌ {channel.mention} is not currently being monitored.",
                 ephemeral=True
             )
             return
 
-        settings['monitored_forums'].remove(channel.id)
+        guild_settings['monitored_forums'].remove(channel.id)
+        guild_settings['digest_forums'].pop(str(channel.id), None)
+        guild_settings['forum_identities'].pop(str(channel.id), None)
+        guild_settings['routes'] = [
+            route for route in guild_settings['routes'] if route['forum_id'] != channel.id
+        ]
         save_settings(settings)
 
         await interaction.response.send_message(
@@ -60,8 +73,9 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
     async def list_forums(self, interaction: discord.Interaction):
         """Show all monitored forums."""
         settings = load_settings()
+        guild_settings = find_guild_settings(settings, interaction.guild.id)
 
-        if not settings['monitored_forums']:
+        if not guild_settings['monitored_forums']:
             await interaction.response.send_message(
                 "📋 No forums are currently being monitored.",
                 ephemeral=True
@@ -70,12 +84,20 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
 
         # Build list of monitored forums
         forum_list = []
-        for forum_id in settings['monitored_forums']:
+        for forum_id in guild_settings['monitored_forums']:
             channel = interaction.guild.get_channel(forum_id)
             if channel:
-                forum_list.append(f"• {channel.mention}")
+                line = f"• {channel.mention}"
             else:
-                forum_list.append(f"• Unknown Forum (ID: {forum_id})")
+                line = f"• Unknown Forum (ID: {forum_id})"
+
+            digest_minutes = guild_settings['digest_forums'].get(str(forum_id))
+            if digest_minutes:
+                line += f" (digest every {digest_minutes} min)"
+            identity = guild_settings['forum_identities'].get(str(forum_id))
+            if identity and identity['username']:
+                line += f" (posts as {identity['username']})"
+            forum_list.append(line)
 
         embed = discord.Embed(
             title="📋 Monitored Forums",
@@ -85,13 +107,239 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
 
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @app_commands.command(name="digest", description="Post a periodic summary for a forum instead of one notification per post")
+    @app_commands.describe(
+        channel="The monitored forum channel",
+        minutes="Minutes between digests (5-1440), or 0 to send one notification per post"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def digest(self, interaction: discord.Interaction, channel: discord.ForumChannel, minutes: int):
+        """Set digest mode for a forum."""
+        if minutes != 0 and (minutes < 5 or minutes > 1440):
+            await interaction.response.send_message(
+                "❌ Digest interval must be between 5 and 1440 minutes, or 0 to turn digests off.",
+                ephemeral=True
+            )
+            return
+
+        settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+
+        if channel.id not in guild_settings['monitored_forums']:
+            await interaction.response.send_message(
+                f"❌ {channel.mention} is not currently being monitored. Use `/forum monitor` first.",
+                ephemeral=True
+            )
+            return
+
+        if minutes == 0:
+            guild_settings['digest_forums'].pop(str(channel.id), None)
+            message = f"✅ {channel.mention} will get one notification per post again."
+        else:
+            guild_settings['digest_forums'][str(channel.id)] = minutes
+            message = f"✅ New posts in {channel.mention} will be summarized every {minutes} minute(s)."
+        save_settings(settings)
+
+        await interaction.response.send_message(message, ephemeral=True)
+
+    @app_commands.command(name="identity", description="Set the name and avatar notifications for a forum are posted with")
+    @app_commands.describe(
+        channel="The monitored forum channel",
+        username="Name to post as (leave both empty to reset)",
+        avatar_url="Image URL to use as the avatar"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def identity(
+        self,
+        interaction: discord.Interaction,
+        channel: discord.ForumChannel,
+        username: Optional[app_commands.Range[str, 1, 80]] = None,
+        avatar_url: Optional[str] = None
+    ):
+        """Set the webhook identity of a forum's notifications."""
+        if avatar_url and not avatar_url.startswith(('https://', 'http://')):
+            await interaction.response.send_message(
+                "❌ Avatar must be an image URL starting with https://",
+                ephemeral=True
+            )
+            return
+
+        settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+
+        if channel.id not in guild_settings['monitored_forums']:
+            await interaction.response.send_message(
+                f"❌ {channel.mention} is not currently being monitored. Use `/forum monitor` first.",
+                ephemeral=True
+            )
+            return
+
+        if username is None and avatar_url is None:
+            guild_settings['forum_identities'].pop(str(channel.id), None)
+            message = f"✅ Notifications for {channel.mention} will use the default name and avatar."
+        else:
+            guild_settings['forum_identities'][str(channel.id)] = {'username': username, 'avatar_url': avatar_url}
+            message = f"✅ Notifications for {channel.mention} will be posted as {username or 'the default name'}."
+        save_settings(settings)
+
+        if getattr(self.bot, 'webhook_sender', None) is None:
+            message += "\nℹ️ This only takes effect when webhook delivery is enabled."
+        await interaction.response.send_message(message, ephemeral=True)
+
+    route = app_commands.Group(name="route", description="Send notifications for some posts to other channels")
+
+    @route.command(name="add", description="Send notifications for a forum's posts to a channel")
+    @app_commands.describe(
+        forum="The monitored forum channel",
+        channel="The channel where matching notifications will be sent",
+        tag="Only posts with this tag",
+        role="Only posts by members with this role"
+    )
+    @app_commands.default_permissions(administrator=True)
+    async def route_add(
+        self,
+        interaction: discord.Interaction,
+        forum: discord.ForumChannel,
+        channel: discord.TextChannel,
+        tag: Optional[str] = None,
+        role: Optional[discord.Role] = None
+    ):
+        """Add a routing rule."""
+        settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+
+        if forum.id not in guild_settings['monitored_forums']:
+            await interaction.response.send_message(
+                f"❌ {forum.mention} is not currently being monitored. Use `/forum monitor` first.",
+                ephemeral=True
+            )
+            return
+
+        if len(guild_settings['routes']) >= MAX_ROUTES:
+            await interaction.response.send_message(
+                f"❌ A server can have at most {MAX_ROUTES} routes. Remove one with `/forum route remove` first.",
+                ephemeral=True
+            )
+            return
+
+        forum_tag = None
+        if tag:
+            # Autocomplete passes the tag ID; a typed name works too
+            forum_tag = next(
+                (t for t in forum.available_tags if str(t.id) == tag or t.name.lower() == tag.lower()), None
+            )
+            if forum_tag is None:
+                await interaction.response.send_message(
+                    f"❌ {forum.mention} has no tag named \"{tag}\".",
+                    ephemeral=True
+                )
+                return
+
+        route = {
+            'forum_id': forum.id,
+            'tag_id': forum_tag.id if forum_tag else None,
+            'role_id': role.id if role else None,
+            'channel_id': channel.id
+        }
+        if route in guild_settings['routes']:
+            await interaction.response.send_message("❌ That route already exists.", ephemeral=True)
+            return
+
+        guild_settings['routes'].append(route)
+        self.bot.channel_resolver.invalidate(channel.id)
+        save_settings(settings)
+
+        await interaction.response.send_message(
+            f"✅ {self._describe_route(interaction.guild, route)}",
+            ephemeral=True
+        )
+
+    @route_add.autocomplete('tag')
+    async def route_tag_autocomplete(self, interaction: discord.Interaction, current: str):
+        """Suggest tags of the forum chosen in the same command."""
+        forum = interaction.namespace.forum
+        channel = interaction.guild.get_channel(forum.id) if forum else None
+        return [
+            app_commands.Choice(name=tag.name, value=str(tag.id))
+            for tag in getattr(channel, 'available_tags', [])
+            if current.lower() in tag.name.lower()
+        ][:25]
+
+    @route.command(name="remove", description="Remove a notification route")
+    @app_commands.describe(number="The route number shown by /forum route list")
+    @app_commands.default_permissions(administrator=True)
+    async def route_remove(self, interaction: discord.Interaction, number: int):
+        """Remove a routing rule by its list number."""
+        settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+
+        if number < 1 or number > len(guild_settings['routes']):
+            await interaction.response.send_message(
+                "❌ No route with that number. Use `/forum route list` to see routes.",
+                ephemeral=True
+            )
+            return
+
+        route = guild_settings['routes'].pop(number - 1)
+        save_settings(settings)
+
+        await interaction.response.send_message(
+            f"✅ Removed route: {self._describe_route(interaction.guild, route)}",
+            ephemeral=True
+        )
+
+    @route.command(name="list", description="Show all notification routes")
+    @app_commands.default_permissions(administrator=True)
+    async def route_list(self, interaction: discord.Interaction):
+        """Show all routing rules."""
+        settings = load_settings()
+        guild_settings = find_guild_settings(settings, interaction.guild.id)
+
+        if not guild_settings['routes']:
+            await interaction.response.send_message(
+                "📋 No routes set. All notifications go to the notification channel.",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(
+            title="🔀 Notification Routes",
+            description="\n".join(
+                f"{number}. {self._describe_route(interaction.guild, route)}"
+                for number, route in enumerate(guild_settings['routes'], start=1)
+            ),
+            color=0x2f3136
+        )
+        embed.set_footer(text="Posts matching no route go to the notification channel")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @staticmethod
+    def _describe_route(guild: discord.Guild, route: dict) -> str:
+        """Describe a routing rule in one line."""
+        forum = guild.get_channel(route['forum_id'])
+        forum_text = forum.mention if forum else f"Unknown Forum (ID: {route['forum_id']})"
+        text = f"Posts in {forum_text}"
+        if route['tag_id']:
+            tag = forum.get_tag(route['tag_id']) if forum else None
+            text += f" tagged {tag.name if tag else 'an unknown tag'}"
+        if route['role_id']:
+            role = guild.get_role(route['role_id'])
+            text += f" by {role.mention if role else 'an unknown role'}"
+        return text + f" → <#{route['channel_id']}>"
+
     @app_commands.command(name="notifications", description="Set the channel for post notifications")
     @app_commands.describe(channel="The channel where notifications will be sent")
     @app_commands.default_permissions(administrator=True)
     async def notifications(self, interaction: discord.Interaction, channel: discord.TextChannel):
         """Set notification channel."""
         settings = load_settings()
-        settings['notification_channel_id'] = channel.id
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+        # Forget cached lookups (including failures) for the old and new channel
+        if guild_settings['notification_channel_id']:
+            self.bot.channel_resolver.invalidate(guild_settings['notification_channel_id'])
+        self.bot.channel_resolver.invalidate(channel.id)
+        guild_settings['notification_channel_id'] = channel.id
         save_settings(settings)
 
         await interaction.response.send_message(
@@ -105,7 +353,12 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
     async def errors(self, interaction: discord.Interaction, channel: discord.TextChannel):
         """Set error reporting channel."""
         settings = load_settings()
-        settings['error_channel_id'] = channel.id
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+        # Forget cached lookups (including failures) for the old and new channel
+        if guild_settings['error_channel_id']:
+            self.bot.channel_resolver.invalidate(guild_settings['error_channel_id'])
+        self.bot.channel_resolver.invalidate(channel.id)
+        guild_settings['error_channel_id'] = channel.id
         save_settings(settings)
 
         await interaction.response.send_message(
@@ -140,7 +393,8 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
             return
 
         settings = load_settings()
-        settings['embed_color'] = hex_color
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+        guild_settings['embed_color'] = hex_color
         save_settings(settings)
 
         # Show preview
@@ -165,7 +419,8 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
             return
 
         settings = load_settings()
-        settings['preview_length'] = length
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+        guild_settings['preview_length'] = length
         save_settings(settings)
 
         await interaction.response.send_message(
@@ -173,24 +428,48 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
             ephemeral=True
         )
 
+    @app_commands.command(name="shrink", description="Set how long notifications stay full size")
+    @app_commands.describe(minutes="Minutes before a notification shrinks to a compact embed (0 to never shrink)")
+    @app_commands.default_permissions(administrator=True)
+    async def shrink(self, interaction: discord.Interaction, minutes: int):
+        """Set the auto-shrink delay."""
+        if minutes < 0 or minutes > 10080:
+            await interaction.response.send_message(
+                "❌ Shrink delay must be between 0 and 10080 minutes (one week).",
+                ephemeral=True
+            )
+            return
+
+        settings = load_settings()
+        guild_settings = get_guild_settings(settings, interaction.guild.id)
+        guild_settings['shrink_delay'] = minutes * 60
+        save_settings(settings)
+
+        if minutes == 0:
+            message = "✅ Notifications will no longer be shrunk."
+        else:
+            message = f"✅ Notifications will shrink to a compact embed after {minutes} minute(s)."
+        await interaction.response.send_message(message, ephemeral=True)
+
     @app_commands.command(name="settings", description="Display all current settings")
     @app_commands.default_permissions(administrator=True)
     async def settings_display(self, interaction: discord.Interaction):
         """Display all current settings."""
         settings = load_settings()
+        guild_settings = find_guild_settings(settings, interaction.guild.id)
 
         # Build settings display
-        notification_channel = interaction.guild.get_channel(settings['notification_channel_id'])
+        notification_channel = interaction.guild.get_channel(guild_settings['notification_channel_id'])
         notification_text = notification_channel.mention if notification_channel else "Not set"
 
-        error_channel = interaction.guild.get_channel(settings['error_channel_id'])
+        error_channel = interaction.guild.get_channel(guild_settings['error_channel_id'])
         error_text = error_channel.mention if error_channel else "Not set"
 
-        monitored_count = len(settings['monitored_forums'])
+        monitored_count = len(guild_settings['monitored_forums'])
 
         embed = discord.Embed(
             title="⚙️ Forum Notifier Settings",
-            color=int(settings['embed_color'].replace('#', ''), 16)
+            color=int(guild_settings['embed_color'].replace('#', ''), 16)
         )
 
         embed.add_field(
@@ -213,13 +492,26 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
 
         embed.add_field(
             name="🎨 Embed Color",
-            value=settings['embed_color'],
+            value=guild_settings['embed_color'],
             inline=True
         )
 
         embed.add_field(
             name="📏 Preview Length",
-            value=f"{settings['preview_length']} characters",
+            value=f"{guild_settings['preview_length']} characters",
+            inline=True
+        )
+
+        shrink_delay = guild_settings['shrink_delay']
+        embed.add_field(
+            name="🗜️ Auto-Shrink",
+            value=f"After {shrink_delay // 60} minute(s)" if shrink_delay else "Off",
+            inline=True
+        )
+
+        embed.add_field(
+            name="🔀 Routes",
+            value=f"{len(guild_settings['routes'])} rule(s)",
             inline=True
         )
 
@@ -230,8 +522,9 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
     async def test(self, interaction: discord.Interaction):
         """Send a test notification."""
         settings = load_settings()
+        guild_settings = find_guild_settings(settings, interaction.guild.id)
 
-        notification_channel_id = settings['notification_channel_id']
+        notification_channel_id = guild_settings['notification_channel_id']
         if not notification_channel_id:
             await interaction.response.send_message(
                 "❌ No notification channel set. Use `/forum notifications` first.",
@@ -240,16 +533,16 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
             return
 
         try:
-            notification_channel = interaction.guild.get_channel(notification_channel_id)
-            if not notification_channel:
-                notification_channel = await interaction.guild.fetch_channel(notification_channel_id)
+            # Always re-check the channel rather than trusting a cached failure
+            self.bot.channel_resolver.invalidate(notification_channel_id)
+            notification_channel = await self.bot.channel_resolver.resolve(notification_channel_id)
 
             # Build test embed
             embed = discord.Embed(
                 title="Test Post Title",
                 url="https://discord.com",
                 description="\"This is a test notification to verify the bot is working correctly...\"\n🏷️ Help • Question\n🎬 Video attached",
-                color=int(settings['embed_color'].replace('#', ''), 16),
+                color=int(guild_settings['embed_color'].replace('#', ''), 16),
                 timestamp=discord.utils.utcnow()
             )
 
@@ -295,6 +588,31 @@ class ConfigCommands(commands.GroupCog, name="forum", description="Forum notifie
                 ephemeral=True
             )
 
+    @app_commands.command(name="reload", description="Reload settings and the bot's code without restarting (bot owner only)")
+    @app_commands.default_permissions(administrator=True)
+    async def reload(self, interaction: discord.Interaction):
+        """Reload settings from storage and the cogs' code, keeping queued work."""
+        # Affects every guild, so guild admins alone aren't enough
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message(
+                "❌ Only the bot owner can reload the bot.",
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        load_settings(revalidate=True)
+        failed = await self.bot.reload_cogs()
+
+        if failed:
+            errors = "\n".join(f"`{extension}`: {error}" for extension, error in failed)
+            await interaction.followup.send(
+                f"⚠️ Reloaded settings, but these cogs kept their previous code:\n{errors}"[:2000],
+                ephemeral=True
+            )
+        else:
+            await interaction.followup.send("✅ Reloaded settings and cogs.", ephemeral=True)
+
 
 async def setup(bot):
     """Setup function for loading the cog."""
@@ -1,125 +1,1186 @@
 import asyncio
+import contextlib
+import logging
+import os
+import time
+from collections import OrderedDict
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import datetime
-from utils.storage import load_settings, save_settings
+from utils.dispatch import DispatchQueue, merge_views
+from utils.errors import ErrorAggregator
+from utils.idempotency import NotifiedThreads
+from utils.metrics import REGISTRY
+from utils.notification_index import NotificationIndex
+from utils.scheduler import ShrinkScheduler
+from utils.sharding import GuildPartition
+from utils.workers import PRIORITY_ERROR_REPORT, PRIORITY_NOTIFICATION, PRIORITY_SHRINK, WorkPool
+from utils.storage import (
+    delete_record, find_guild_settings, get_settings_generation, load_records, load_settings,
+    put_record
+)
+
+# Number of notification shrinks that may be edited at the same time
+SHRINK_WORKERS = int(os.getenv('SHRINK_WORKERS', '2'))
+
+# Jobs (preparing notifications, shrinks, live edits, error reports) run at once,
+# and how many may wait. When the queue is full new posts go to a digest instead.
+PIPELINE_WORKERS = int(os.getenv('PIPELINE_WORKERS', '10'))
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '500'))
+# Queued jobs from which new posts get compact notifications without a preview
+PIPELINE_COMPACT_DEPTH = int(os.getenv('PIPELINE_COMPACT_DEPTH', '200'))
+
+# Notifications for the same channel within this many seconds share a message
+DISPATCH_FLUSH_INTERVAL = float(os.getenv('DISPATCH_FLUSH_INTERVAL', '0.5'))
+# Max notifications packed into one message (Discord allows up to 10 embeds)
+DISPATCH_MAX_BATCH = int(os.getenv('DISPATCH_MAX_BATCH', '10'))
+
+# Seconds to wait for a thread's starter message from the gateway before fetching it
+STARTER_MESSAGE_TIMEOUT = float(os.getenv('STARTER_MESSAGE_TIMEOUT', '2.0'))
+# Starter messages kept when they arrive before their thread's create event
+# is handled, which under load can be as many as the pipeline queues
+EARLY_STARTER_LIMIT = max(100, PIPELINE_QUEUE_SIZE)
+
+# Repeats of an error within this many seconds are summarized instead of posted
+ERROR_REPEAT_WINDOW = float(os.getenv('ERROR_REPEAT_WINDOW', '300'))
+
+# Catch-up after (re)connecting: max missed posts announced per forum, how many
+# are processed at once, and whether recently archived posts are included
+CATCH_UP_LIMIT = int(os.getenv('CATCH_UP_LIMIT', '50'))
+CATCH_UP_CONCURRENCY = int(os.getenv('CATCH_UP_CONCURRENCY', '2'))
+CATCH_UP_ARCHIVED = os.getenv('CATCH_UP_ARCHIVED', 'false').lower() in ('1', 'true', 'yes')
+
+# Announced thread IDs remembered to suppress duplicate notifications
+NOTIFIED_THREAD_LIMIT = int(os.getenv('NOTIFIED_THREAD_LIMIT', '10000'))
+# Seconds a thread is remembered; older threads are never treated as new
+NOTIFIED_THREAD_TTL = float(os.getenv('NOTIFIED_THREAD_TTL', str(7 * 24 * 3600)))
+
+# Seconds to gather a post's renames, retags and deletion into one notification edit
+NOTIFICATION_EDIT_DEBOUNCE = float(os.getenv('NOTIFICATION_EDIT_DEBOUNCE', '10'))
+
+EVENTS = REGISTRY.counter(
+    'forum_notifier_thread_events_total',
+    'Thread create events by outcome (received, filtered, duplicate, digested, notified, failed)'
+)
+STAGE_SECONDS = REGISTRY.histogram(
+    'forum_notifier_stage_seconds',
+    'Time spent in each stage of handling a new thread'
+)
+
+log = logging.getLogger(__name__)
+# Thread event outcomes logged above debug level
+OUTCOME_LOG_LEVELS = {'notified': logging.INFO, 'digested': logging.INFO, 'failed': logging.WARNING}
+
+# Record kind for threads waiting to go out in a forum digest
+DIGEST_RECORD_KIND = "digest_buffer"
+# Digest checks a post may fail to go out on (e.g. to a deleted channel) before it's dropped
+DIGEST_MAX_ATTEMPTS = 10
+# Record kind for each forum's catch-up high-water mark (a snowflake)
+WATERMARK_RECORD_KIND = "forum_watermarks"
+# Max description length of an embed
+EMBED_DESCRIPTION_LIMIT = 4096
+
+
+def _thread_fields(thread) -> dict:
+    """Structured log fields identifying a thread."""
+    return {'guild_id': thread.guild.id, 'forum_id': thread.parent_id, 'thread_id': thread.id}
+
+
+class ForumTemplate:
+    """Per-forum values reused by every embed built for that forum."""
+
+    __slots__ = ('forum_name', 'forum_url', 'footer', 'color', 'tag_lookup', 'identity')
+
+    def __init__(self, guild_id: int, forum_id: int, forum, settings: dict):
+        self.forum_name = forum.name if forum else "Unknown Forum"
+        self.forum_url = f"https://discord.com/channels/{guild_id}/{forum_id}"
+        self.footer = f"Posted in #{self.forum_name}"
+        self.color = int(settings['embed_color'].replace('#', ''), 16)
+        self.tag_lookup = {tag.id: tag.name for tag in getattr(forum, 'available_tags', None) or []}
+        # (username, avatar_url) to post as with webhook delivery, None for the defaults
+        identity = settings['forum_identities'].get(str(forum_id))
+        self.identity = (identity['username'], identity['avatar_url']) if identity else None
 
 
 class ForumListener(commands.Cog):
     """Listens for new forum posts and sends notifications."""
 
+    # Live state handed to the reloaded instance by /forum reload, so queued
+    # notifications, shrink timers and pending edits survive a code reload
+    HANDOVER_ATTRIBUTES = (
+        'pool', '_load_state', 'shed_stats', 'shrink_scheduler', 'dispatcher', '_digest_buffer',
+        '_pending_starters', '_early_starters', 'starter_stats', 'error_aggregator', 'notified_threads',
+        '_watermarks', '_scanned_forums', '_catch_up_task', 'notification_index', '_pending_changes', 'update_stats',
+    )
+
     def __init__(self, bot):
         self.bot = bot
+        # Guilds this process handles; set by the bot when shards are split across processes
+        self.partition = getattr(bot, 'partition', None) or GuildPartition()
+        # forum_id -> settings of the guild monitoring it, rebuilt when settings change
+        self._forum_index = {}
+        # forum_id -> {tag_id or None: [(role_id or None, channel_id), ...]}, from routing rules
+        self._route_index = {}
+        self._index_generation = None
+        self.pool = WorkPool(workers=PIPELINE_WORKERS, max_queue=PIPELINE_QUEUE_SIZE)
+        # 'normal', 'compact' or 'digest'; logged when it changes
+        self._load_state = 'normal'
+        self.shed_stats = {'compact': 0, 'digest': 0, 'error_report': 0}
+        self.shrink_scheduler = ShrinkScheduler(self._run_shrink, workers=SHRINK_WORKERS)
+        # Set by the bot when webhook delivery is enabled
+        self.webhook_sender = getattr(bot, 'webhook_sender', None)
+        self.dispatcher = DispatchQueue(
+            flush_interval=DISPATCH_FLUSH_INTERVAL,
+            max_batch=DISPATCH_MAX_BATCH,
+            on_sent=self._on_notifications_sent,
+            sender=self.webhook_sender.send if self.webhook_sender else None
+        )
+        # forum_id -> threads waiting for that forum's next digest, oldest first
+        self._digest_buffer = {}
+        # thread_id -> future resolved by on_message with the thread's starter message
+        self._pending_starters = {}
+        # Starter messages seen before on_thread_create, by thread ID
+        self._early_starters = OrderedDict()
+        # How each starter message was obtained
+        self.starter_stats = {'cached': 0, 'gateway': 0, 'rest': 0, 'failed': 0}
+        self.error_aggregator = ErrorAggregator(window=ERROR_REPEAT_WINDOW)
+        # forum_id -> ForumTemplate, dropped on channel updates and settings changes
+        self._templates = {}
+        self._template_generation = None
+        self.notified_threads = NotifiedThreads(max_entries=NOTIFIED_THREAD_LIMIT, ttl=NOTIFIED_THREAD_TTL)
+        # forum_id -> (snowflake, guild_id); posts after it may have been missed while offline
+        self._watermarks = {}
+        # Forums caught up since the last disconnect; live posts move their marks forward
+        self._scanned_forums = set()
+        self._catch_up_task = None
+        # Sent notification messages, kept as long as their threads are remembered
+        self.notification_index = NotificationIndex(max_entries=NOTIFIED_THREAD_LIMIT, ttl=NOTIFIED_THREAD_TTL)
+        # message_id -> {thread_id: deleted} changes waiting for the message's debounced edit
+        self._pending_changes = {}
+        self._pending_edits = {}
+        self.update_stats = {'edited': 0, 'deleted': 0, 'coalesced': 0, 'failed': 0}
+
+    async def cog_load(self):
+        """Resume notification shrinks and digests left pending by the last run.
+
+        When the cog is reloaded, the previous instance's live state is
+        taken over instead of being read back from storage.
+        """
+        handover = getattr(self.bot, 'handover', None)
+        state = handover.pop(self.qualified_name, None) if handover else None
+        if state is not None:
+            self._take_over(state)
+        else:
+            self._restore()
+        self.digest_loop.start()
+        self.error_summary_loop.start()
+        self._register_metrics()
+
+    def _restore(self):
+        """Load persisted state and start the pool and shrink timers.
+
+        Only state of guilds handled by this process is loaded, so processes
+        sharing a store never run the same shrink or send the same digest.
+        """
+        owns = self.partition.owns
+        self.notified_threads.load(owns)
+        self.notification_index.load(owns)
+        for key, value in load_records(WATERMARK_RECORD_KIND).items():
+            # Stored as [mark, guild_id]; older records are just the mark
+            mark, guild_id = value if isinstance(value, list) else (value, None)
+            if owns(guild_id):
+                self._watermarks[int(key)] = (mark, guild_id)
+        self.shrink_scheduler.load(owns)
+        self.pool.start()
+        self.shrink_scheduler.start()
+        log.info("Loaded %d pending notification shrink(s)", len(self.shrink_scheduler))
+
+        entries = sorted(load_records(DIGEST_RECORD_KIND).values(), key=lambda entry: entry['queued_at'])
+        for entry in entries:
+            if not owns(entry['guild_id']):
+                continue
+            self._digest_buffer.setdefault(entry['forum_id'], []).append(entry)
+
+    def _take_over(self, state: dict):
+        """Adopt the live state of the instance this one replaces."""
+        for name, value in state.items():
+            setattr(self, name, value)
+        # Callbacks and debounced edits run this instance's code from now on;
+        # jobs already queued on the pool finish with the code they were queued with
+        self.shrink_scheduler.handler = self._run_shrink
+        self.dispatcher.on_sent = self._on_notifications_sent
+        for message_id in self._pending_changes:
+            self._pending_edits[message_id] = asyncio.create_task(self._edit_after_debounce(message_id))
+        log.info("Took over %d queued job(s), %d pending shrink(s) and %d pending edit(s)",
+                 self.pool.depth(), len(self.shrink_scheduler), len(self._pending_edits))
+
+    async def cog_unload(self):
+        """Send queued notifications and stop background work; pending shrinks and digests stay persisted.
+
+        When the cog is being reloaded, live state is handed over instead.
+        """
+        self.digest_loop.cancel()
+        self.error_summary_loop.cancel()
+        handover = getattr(self.bot, 'handover', None)
+        if handover is not None:
+            # The new instance re-arms the edit timers with its own code
+            for task in self._pending_edits.values():
+                task.cancel()
+            handover[self.qualified_name] = {name: getattr(self, name) for name in self.HANDOVER_ATTRIBUTES}
+            return
+
+        if self._catch_up_task is not None:
+            self._catch_up_task.cancel()
+        await self.shrink_scheduler.stop()
+        # Apply pending notification edits now instead of after their debounce
+        pending = list(self._pending_edits.items())
+        for _, task in pending:
+            task.cancel()
+        await asyncio.gather(
+            *(self._apply_notification_edit(message_id) for message_id, _ in pending), return_exceptions=True
+        )
+        await self.pool.stop()
+        await self.dispatcher.flush()
+
+    def _register_metrics(self):
+        """Export queue depths and counters kept by this cog's components."""
+        REGISTRY.callback(
+            'forum_notifier_gateway_latency_seconds', 'Gateway heartbeat latency',
+            lambda: self.bot.latency
+        )
+        REGISTRY.callback(
+            'forum_notifier_pipeline_queue_depth', 'Jobs waiting for a pipeline worker',
+            self.pool.depth
+        )
+        REGISTRY.callback(
+            'forum_notifier_pipeline_jobs_total', 'Pipeline jobs by outcome',
+            lambda: dict(self.pool.stats), metric_type='counter', label='result'
+        )
+        REGISTRY.callback(
+            'forum_notifier_load_shed_total', 'Work degraded or skipped under overload',
+            lambda: dict(self.shed_stats), metric_type='counter', label='action'
+        )
+        REGISTRY.callback(
+            'forum_notifier_pending_shrinks', 'Notification shrinks waiting to run',
+            lambda: len(self.shrink_scheduler)
+        )
+        REGISTRY.callback(
+            'forum_notifier_dispatch_queue_depth', 'Notifications waiting to be sent',
+            self.dispatcher.depth
+        )
+        REGISTRY.callback(
+            'forum_notifier_dispatch_total', 'Dispatch queue counters',
+            lambda: {key: value for key, value in self.dispatcher.stats.items() if not key.startswith('latency')},
+            metric_type='counter', label='kind'
+        )
+        REGISTRY.callback(
+            'forum_notifier_dispatch_latency_seconds_max', 'Longest time a notification waited in the dispatch queue',
+            lambda: self.dispatcher.stats['latency_max']
+        )
+        REGISTRY.callback(
+            'forum_notifier_dispatch_latency_seconds_avg', 'Mean time notifications waited in the dispatch queue',
+            self.dispatcher.average_latency
+        )
+        REGISTRY.callback(
+            'forum_notifier_digest_buffered', 'Threads waiting for a forum digest',
+            lambda: sum(len(entries) for entries in self._digest_buffer.values())
+        )
+        REGISTRY.callback(
+            'forum_notifier_starter_messages_total', 'How thread starter messages were obtained',
+            lambda: dict(self.starter_stats), metric_type='counter', label='path'
+        )
+        REGISTRY.callback(
+            'forum_notifier_channel_lookups_total', 'Channel resolver lookups by result',
+            lambda: dict(self.bot.channel_resolver.stats), metric_type='counter', label='result'
+        )
+        REGISTRY.callback(
+            'forum_notifier_owner_lookups_total', 'Thread owner lookups by result',
+            lambda: dict(self.bot.owner_resolver.stats), metric_type='counter', label='result'
+        )
+        REGISTRY.callback(
+            'forum_notifier_notification_updates_total',
+            'Notification edits after posts were renamed, retagged or deleted',
+            lambda: dict(self.update_stats), metric_type='counter', label='result'
+        )
+        REGISTRY.callback(
+            'forum_notifier_notified_threads', 'Thread IDs remembered to suppress duplicate notifications',
+            lambda: len(self.notified_threads)
+        )
+        if self.webhook_sender:
+            REGISTRY.callback(
+                'forum_notifier_webhook_total', 'Webhook delivery counters',
+                lambda: dict(self.webhook_sender.stats), metric_type='counter', label='kind'
+            )
+        REGISTRY.callback(
+            'forum_notifier_errors_total', 'Error reports by outcome',
+            lambda: dict(self.error_aggregator.stats), metric_type='counter', label='outcome'
+        )
+
+    def _get_forum_settings(self, forum_id: int):
+        """Return the guild settings for a monitored forum, or None if not monitored."""
+        if self._index_generation != get_settings_generation():
+            self._rebuild_forum_index()
+        return self._forum_index.get(forum_id)
+
+    def _rebuild_forum_index(self):
+        """Rebuild the forum and routing lookups from current settings."""
+        settings = load_settings()
+        self._index_generation = get_settings_generation()
+        self._forum_index = {
+            forum_id: guild_settings
+            for guild_settings in settings['guilds'].values()
+            for forum_id in guild_settings['monitored_forums']
+        }
+        self._route_index = {}
+        for guild_settings in settings['guilds'].values():
+            for route in guild_settings['routes']:
+                tags = self._route_index.setdefault(route['forum_id'], {})
+                tags.setdefault(route['tag_id'], []).append((route['role_id'], route['channel_id']))
+
+    def _get_template(self, guild_id: int, forum_id: int, forum, settings: dict) -> ForumTemplate:
+        """Return the cached template for a forum, building it if needed."""
+        if self._template_generation != get_settings_generation():
+            # Color or other settings may have changed
+            self._templates.clear()
+            self._template_generation = get_settings_generation()
+
+        template = self._templates.get(forum_id)
+        if template is None:
+            template = ForumTemplate(guild_id, forum_id, forum, settings)
+            # Don't keep placeholders for forums that aren't cached yet
+            if forum is not None:
+                self._templates[forum_id] = template
+        return template
+
+    def _get_thread_template(self, thread: discord.Thread, settings: dict) -> ForumTemplate:
+        """Return the template for a thread's forum."""
+        return self._get_template(thread.guild.id, thread.parent_id, thread.parent, settings)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_update(self, before, after):
+        """Drop cached state for a channel whose name, tags or permissions may have changed."""
+        self._templates.pop(after.id, None)
+        self.bot.channel_resolver.invalidate(after.id)
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        """Drop cached state for a deleted channel."""
+        self._templates.pop(channel.id, None)
+        self.bot.channel_resolver.invalidate(channel.id)
 
     @commands.Cog.listener()
     async def on_thread_create(self, thread: discord.Thread):
         """Handle new thread creation in monitored forums."""
-        settings = load_settings()
+        await self._handle_new_thread(thread)
+
+    async def _handle_new_thread(self, thread: discord.Thread, live: bool = True):
+        """Announce a new thread in a monitored forum.
+
+        Args:
+            thread: The new thread.
+            live: False for threads found by catch-up, whose starter message
+                won't arrive from the gateway any more.
+        """
+        EVENTS.inc(result='received')
+        # stage -> milliseconds, logged with the outcome
+        timings = {}
 
         # Check if thread is in a monitored forum
-        if thread.parent_id not in settings['monitored_forums']:
+        with self._timed(timings, 'settings'):
+            settings = self._get_forum_settings(thread.parent_id)
+        if settings is None:
+            self._record_outcome(thread, 'filtered', timings)
             return
 
-        # Check if this is a newly created thread (not archived/unarchived)
-        # Threads created more than 10 seconds ago are likely unarchived, not new
+        # Threads older than the notified index remembers can't be told apart
+        # from ones already announced, so they're never treated as new
         now = datetime.datetime.now(datetime.timezone.utc)
         age = (now - thread.created_at).total_seconds()
+        if age > self.notified_threads.ttl:
+            self._record_outcome(thread, 'filtered', timings)
+            return
 
-        if age > 10:
-            return  # Skip old/unarchived threads
+        # Announce each thread once, however late or often its event arrives
+        if not self.notified_threads.add(thread.id, thread.guild.id):
+            self._record_outcome(thread, 'duplicate', timings)
+            return
 
-        # Check if notification channel is set
-        notification_channel_id = settings['notification_channel_id']
-        if not notification_channel_id:
-            print(f"Warning: New post in {thread.parent.name} but no notification channel set")
+        # Forums in digest mode are announced in periodic summaries instead
+        if settings['digest_forums'].get(str(thread.parent_id)):
+            self._queue_digest_entry(thread, settings)
+            self._record_outcome(thread, 'digested', timings)
+            if live:
+                self._advance_watermark(thread)
             return
 
-        # Get notification channel
         try:
-            notification_channel = self.bot.get_channel(notification_channel_id)
-            if not notification_channel:
-                notification_channel = await self.bot.fetch_channel(notification_channel_id)
-        except discord.NotFound:
-            await self._handle_error(
-                settings,
-                f"Notification channel (ID: {notification_channel_id}) not found or deleted"
+            await self._announce(thread, settings, live, timings)
+        except Exception as e:
+            # Release the claim so a later event or catch-up can try again
+            self.notified_threads.discard(thread.id)
+            self._record_outcome(thread, 'failed', timings)
+            log.exception("Error announcing thread", extra=_thread_fields(thread))
+            forum_name = self._get_thread_template(thread, settings).forum_name
+            await self._handle_error(settings, f"Failed to send notification for post in {forum_name}: {e}")
+            return
+
+        # Posts that failed gave up their claim and are left for catch-up
+        if live and thread.id in self.notified_threads:
+            self._advance_watermark(thread)
+
+    async def _announce(self, thread: discord.Thread, settings: dict, live: bool, timings: dict):
+        """Prepare a claimed thread's notification on the pool and send it."""
+        # Prepare on the bounded pool; under load degrade to compact embeds, then to the digest
+        depth = self.pool.depth()
+        compact = depth >= PIPELINE_COMPACT_DEPTH
+        try:
+            future = self.pool.submit(
+                PRIORITY_NOTIFICATION, self._prepare_notification,
+                thread, settings, live, compact, time.monotonic(), timings
             )
+        except asyncio.QueueFull:
+            self._set_load_state('digest', depth)
+            # Routed like a notification, without fetching the author for role rules
+            destinations = self._get_destinations(thread, settings)
+            if not destinations:
+                log.warning("New post but no notification channel set", extra=_thread_fields(thread))
+                self.notified_threads.discard(thread.id)
+                self._record_outcome(thread, 'filtered', timings)
+                return
+            self.shed_stats['digest'] += 1
+            self._queue_digest_entry(thread, settings, destinations)
+            self._record_outcome(thread, 'digested', timings)
+            return
+        self._set_load_state('compact' if compact else 'normal', depth)
+        if compact:
+            self.shed_stats['compact'] += 1
+
+        prepared = await future
+        if prepared is None:
             return
+        channels, embed, view = prepared
+
+        # Includes time spent waiting for the batch to fill
+        with self._timed(timings, 'send'):
+            results = await asyncio.gather(
+                *(self._send_notification(thread, settings, channel, embed, view) for channel in channels)
+            )
+
+        if any(results):
+            self._record_outcome(thread, 'notified', timings, destinations=len(channels))
+        else:
+            # Allow a later event for this thread to try again
+            self.notified_threads.discard(thread.id)
+            self._record_outcome(thread, 'failed', timings)
+
+    @contextlib.contextmanager
+    def _timed(self, timings: dict, stage: str):
+        """Observe a stage's duration in the stage histogram and in `timings` (ms)."""
+        start = time.perf_counter()
+        with STAGE_SECONDS.time(stage=stage):
+            yield
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+    def _record_outcome(self, thread: discord.Thread, result: str, timings: dict, **fields):
+        """Count a thread event's outcome and log it with the thread's IDs and stage timings."""
+        EVENTS.inc(result=result)
+        level = OUTCOME_LOG_LEVELS.get(result, logging.DEBUG)
+        log.log(level, "Thread %s", result, extra={
+            'event': f'thread_{result}', **_thread_fields(thread), 'stage_ms': timings, **fields
+        })
+
+    def _set_load_state(self, state: str, depth: int):
+        """Log when the pipeline starts or stops degrading notifications."""
+        if state != self._load_state:
+            self._load_state = state
+            level = logging.INFO if state == 'normal' else logging.WARNING
+            log.log(level, "Notification pipeline now %s", state,
+                    extra={'event': 'load_state', 'queue_depth': depth})
+
+    async def _prepare_notification(self, thread: discord.Thread, settings: dict, live: bool, compact: bool,
+                                    queued_at: float, timings: dict):
+        """Resolve destinations and build a thread's notification. Run on the pool.
+
+        Returns:
+            (channels, embed, view), or None after recording why it can't be sent.
+        """
+        # Role routing and the embed need the author; fetched if the member cache is off
+        with self._timed(timings, 'owner'):
+            await self.bot.owner_resolver.resolve(thread)
+
+        # Destinations from routing rules, else the notification channel
+        destinations = self._get_destinations(thread, settings)
+        if not destinations:
+            log.warning("New post but no notification channel set", extra=_thread_fields(thread))
+            self.notified_threads.discard(thread.id)
+            self._record_outcome(thread, 'filtered', timings)
+            return None
+
+        # Resolve every destination at once; unusable ones are reported and skipped
+        with self._timed(timings, 'channel'):
+            channels = await asyncio.gather(
+                *(self._resolve_destination(channel_id, settings) for channel_id in destinations)
+            )
+        channels = [channel for channel in channels if channel is not None]
+        if not channels:
+            self.notified_threads.discard(thread.id)
+            self._record_outcome(thread, 'failed', timings)
+            return None
+
+        # Compact notifications have no preview, so the starter message isn't needed
+        starter_message = None
+        if not compact:
+            try:
+                # After a long wait in the queue the gateway message would already be here
+                wait = live and time.monotonic() - queued_at < STARTER_MESSAGE_TIMEOUT
+                with self._timed(timings, 'starter_message'):
+                    starter_message = await self._get_starter_message(thread, wait=wait)
+            except Exception as e:
+                log.warning("Error fetching thread starter message: %s", e, extra=_thread_fields(thread))
+
+        # Build the notification once; it's sent to every destination concurrently
+        try:
+            with self._timed(timings, 'embed'):
+                if compact:
+                    embed = self._build_compact_embed(thread, settings)
+                else:
+                    embed = self._build_embed(thread, settings, starter_message)
+                view = self._build_buttons(thread, settings)
+        except Exception as e:
+            self.notified_threads.discard(thread.id)
+            self._record_outcome(thread, 'failed', timings)
+            await self._handle_error(settings, f"Failed to build notification for post in {thread.parent.name}: {str(e)}")
+            return None
+        return channels, embed, view
+
+    def _get_destinations(self, thread: discord.Thread, settings: dict) -> list:
+        """Return the channel IDs a new thread should be announced in.
+
+        Looks up the rules for the thread's forum, for no tag and for each of
+        its tags, so the cost doesn't grow with the number of rules. Without a
+        matching rule, returns the guild's notification channel (if set).
+        """
+        if self._index_generation != get_settings_generation():
+            self._rebuild_forum_index()
+
+        routes = self._route_index.get(thread.parent_id)
+        if routes:
+            candidates = list(routes.get(None, ()))
+            for tag in thread.applied_tags:
+                candidates.extend(routes.get(tag.id, ()))
+
+            role_ids = None
+            destinations = {}
+            for role_id, channel_id in candidates:
+                if role_id is not None:
+                    if role_ids is None:
+                        owner = self.bot.owner_resolver.get(thread)
+                        role_ids = {role.id for role in getattr(owner, 'roles', ())}
+                    if role_id not in role_ids:
+                        continue
+                destinations[channel_id] = None
+            if destinations:
+                return list(destinations)
+
+        notification_channel_id = settings['notification_channel_id']
+        return [notification_channel_id] if notification_channel_id else []
+
+    async def _resolve_destination(self, channel_id: int, settings: dict):
+        """Return the channel for a destination ID, or None after reporting why it can't be used."""
+        try:
+            return await self.bot.channel_resolver.resolve(channel_id)
+        except discord.NotFound:
+            await self._handle_error(settings, f"Notification channel (ID: {channel_id}) not found or deleted")
         except discord.Forbidden:
             await self._handle_error(
-                settings,
-                f"Missing permissions to access notification channel (ID: {notification_channel_id})"
+                settings, f"Missing permissions to access notification channel (ID: {channel_id})"
             )
-            return
+        except discord.HTTPException as e:
+            # e.g. a 5xx, or rate limit retries exhausted; not cached, so the next post tries again
+            await self._handle_error(settings, f"Failed to look up notification channel (ID: {channel_id}): {e}")
+        return None
 
-        # Build and send notification
+    async def _send_notification(self, thread: discord.Thread, settings: dict, channel, embed, view) -> bool:
+        """Queue a thread's notification for one channel. Returns True once sent."""
         try:
-            embed = await self._build_embed(thread, settings)
-            view = self._build_buttons(thread)
-            message = await notification_channel.send(embed=embed, view=view)
-            asyncio.create_task(self._auto_shrink(message, thread))
+            identity = self._get_thread_template(thread, settings).identity if self.webhook_sender else None
+            await self.dispatcher.send(channel, embed, view, key=thread.id, identity=identity)
+            return True
         except Exception as e:
             await self._handle_error(
                 settings,
                 f"Failed to send notification for post in {thread.parent.name}: {str(e)}"
             )
+            return False
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Hand forum starter messages to notifications waiting for them."""
+        # A thread's starter message shares the thread's ID
+        if message.id != message.channel.id:
+            return
+
+        future = self._pending_starters.pop(message.id, None)
+        if future is not None:
+            if not future.done():
+                future.set_result(message)
+            return
+
+        # Thread event not processed yet; keep it briefly for _get_starter_message
+        if self._get_forum_settings(getattr(message.channel, 'parent_id', None)) is not None:
+            self._early_starters[message.id] = message
+            if len(self._early_starters) > EARLY_STARTER_LIMIT:
+                self._early_starters.popitem(last=False)
+
+    async def _get_starter_message(self, thread: discord.Thread, wait: bool = True):
+        """Return a thread's starter message, preferring the gateway over REST.
+
+        Checks the message cache, then (if `wait`) waits up to
+        STARTER_MESSAGE_TIMEOUT for the MESSAGE_CREATE event, and only then
+        fetches the message.
+        """
+        starter_message = thread.starter_message
+        if starter_message:
+            self.starter_stats['cached'] += 1
+            return starter_message
+
+        starter_message = self._early_starters.pop(thread.id, None)
+        if starter_message:
+            self.starter_stats['gateway'] += 1
+            return starter_message
+
+        if wait:
+            future = asyncio.get_running_loop().create_future()
+            self._pending_starters[thread.id] = future
+            try:
+                starter_message = await asyncio.wait_for(future, timeout=STARTER_MESSAGE_TIMEOUT)
+                self.starter_stats['gateway'] += 1
+                return starter_message
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._pending_starters.pop(thread.id, None)
+
+        try:
+            # Fetch using thread ID (equals starter message ID)
+            starter_message = await thread.fetch_message(thread.id)
+            self.starter_stats['rest'] += 1
+            return starter_message
+        except Exception:
+            self.starter_stats['failed'] += 1
+            raise
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """Announce posts created while the bot was offline."""
+        self._start_catch_up()
+
+    @commands.Cog.listener()
+    async def on_resumed(self):
+        """Announce posts whose events were missed while disconnected."""
+        self._start_catch_up()
+
+    @commands.Cog.listener()
+    async def on_disconnect(self):
+        """Stop moving marks forward from live posts until catch-up has scanned for missed ones."""
+        self._scanned_forums.clear()
+
+    def _start_catch_up(self):
+        """Run catch-up in the background unless it is already running."""
+        if self._catch_up_task is None or self._catch_up_task.done():
+            self._catch_up_task = asyncio.create_task(self._catch_up())
+
+    async def _catch_up(self):
+        """Announce posts newer than each monitored forum's high-water mark.
+
+        Forums seen for the first time only get a mark, so their history
+        isn't announced. Posts already announced are skipped by the notified
+        index, so running this again (e.g. after an interrupted run) is safe.
+        """
+        mark = discord.utils.time_snowflake(discord.utils.utcnow())
+        semaphore = asyncio.Semaphore(CATCH_UP_CONCURRENCY)
+        # forum_id -> guild_id, for the guilds this process handles
+        monitored = {
+            forum_id: int(guild_id)
+            for guild_id, guild_settings in load_settings()['guilds'].items()
+            if self.partition.owns(int(guild_id))
+            for forum_id in guild_settings['monitored_forums']
+        }
+
+        announced = 0
+        for forum_id, guild_id in monitored.items():
+            try:
+                found = await self._catch_up_forum(forum_id, semaphore)
+            except Exception:
+                # Keep the old mark so the next run tries again
+                log.exception("Error catching up on forum", extra={'guild_id': guild_id, 'forum_id': forum_id})
+                continue
+            if found is None:
+                # Not scanned, so posts after the old mark may still be missing
+                continue
+            announced += found
+            self._watermarks[forum_id] = (mark, guild_id)
+            put_record(WATERMARK_RECORD_KIND, forum_id, [mark, guild_id])
+            self._scanned_forums.add(forum_id)
+
+        # Forums monitored again later start from scratch
+        for forum_id in self._watermarks.keys() - monitored:
+            del self._watermarks[forum_id]
+            self._scanned_forums.discard(forum_id)
+            delete_record(WATERMARK_RECORD_KIND, forum_id)
+
+        if announced:
+            log.info("Catch-up announced %d missed post(s)", announced)
+
+    async def _catch_up_forum(self, forum_id: int, semaphore: asyncio.Semaphore):
+        """Announce a forum's unannounced posts newer than its mark.
+
+        Returns:
+            How many were announced, or None if the forum isn't cached and wasn't scanned.
+        """
+        watermark, _ = self._watermarks.get(forum_id, (None, None))
+        forum = self.bot.get_channel(forum_id)
+        if forum is None:
+            return None
+        if watermark is None:
+            return 0
+
+        # Active threads are cached from the gateway; no REST calls needed
+        threads = {thread.id: thread for thread in forum.threads if thread.id > watermark}
+        if CATCH_UP_ARCHIVED:
+            since = discord.utils.snowflake_time(watermark)
+            # Newest archived first
+            async for thread in forum.archived_threads(limit=CATCH_UP_LIMIT):
+                if thread.archive_timestamp < since:
+                    break
+                if thread.id > watermark:
+                    threads.setdefault(thread.id, thread)
+
+        missed = [thread for thread_id, thread in sorted(threads.items()) if thread_id not in self.notified_threads]
+        if len(missed) > CATCH_UP_LIMIT:
+            log.warning(
+                "Catch-up: skipping %d older missed post(s)", len(missed) - CATCH_UP_LIMIT,
+                extra={'guild_id': forum.guild.id, 'forum_id': forum_id}
+            )
+            missed = missed[-CATCH_UP_LIMIT:]
+
+        async def announce(thread):
+            async with semaphore:
+                await self._handle_new_thread(thread, live=False)
+
+        await asyncio.gather(*(announce(thread) for thread in missed))
+        return len(missed)
+
+    def _advance_watermark(self, thread: discord.Thread):
+        """Move a forum's mark past a live post, so the next catch-up doesn't scan back over it.
+
+        Only for forums caught up since the last disconnect; otherwise posts
+        older than this one may still be waiting for catch-up.
+        """
+        if thread.parent_id not in self._scanned_forums:
+            return
+        mark, guild_id = self._watermarks[thread.parent_id]
+        if thread.id > mark:
+            self._watermarks[thread.parent_id] = (thread.id, guild_id)
+            put_record(WATERMARK_RECORD_KIND, thread.parent_id, [thread.id, guild_id])
+
+    def _on_notifications_sent(self, message: discord.Message, thread_ids: list):
+        """Index a sent notification message (one or more embeds) and schedule its shrink."""
+        via_webhook = getattr(message, 'webhook_id', None) is not None
+        self.notification_index.add(message.id, message.channel.id, message.guild.id, thread_ids, via_webhook)
+
+        settings = find_guild_settings(load_settings(), message.guild.id, legacy=True)
+        if settings['shrink_delay'] > 0:
+            self.shrink_scheduler.schedule(
+                message.channel.id, message.id, thread_ids, settings['shrink_delay'],
+                via_webhook=via_webhook,
+                guild_id=message.guild.id
+            )
 
-    async def _auto_shrink(self, message: discord.Message, thread: discord.Thread):
-        await asyncio.sleep(300)
+    async def _run_shrink(self, job):
+        """Run a due shrink on the pool, behind pending notifications. Called by the shrink scheduler."""
+        await self.pool.run(PRIORITY_SHRINK, self._shrink, job)
+
+    async def _shrink(self, job):
+        """Replace a notification's embeds with compact ones."""
+        entry = self.notification_index.get(job.message_id)
+        # Threads deleted since the message was sent are already gone from the index
+        thread_ids = entry.thread_ids if entry is not None else job.thread_ids
+        lock = entry.lock if entry is not None else asyncio.Lock()
         try:
-            settings = load_settings()
-            compact_embed = self._build_compact_embed(thread, settings)
-            await message.edit(embed=compact_embed, view=None)
+            async with lock:
+                compact_embeds = []
+                for thread_id in thread_ids:
+                    thread = await self._get_thread(thread_id)
+                    if thread is None:
+                        continue
+                    settings = find_guild_settings(load_settings(), thread.guild.id, legacy=True)
+                    compact_embeds.append(self._build_compact_embed(thread, settings))
+
+                if not compact_embeds:
+                    return
+
+                await self._edit_notification(
+                    job.channel_id, job.message_id, job.via_webhook, embeds=compact_embeds, view=None
+                )
+                self.notification_index.mark_shrunk(job.message_id)
         except discord.NotFound:
-            pass
-        except Exception as e:
-            print(f"Error shrinking notification for '{thread.name}': {e}")
+            # Notification deleted in the meantime
+            self.notification_index.discard(job.message_id)
+        except Exception:
+            log.exception(
+                "Error shrinking notification", extra={'guild_id': job.guild_id, 'message_id': job.message_id}
+            )
+
+    async def _get_thread(self, thread_id: int):
+        """Return a thread from the cache or REST, or None if it was deleted."""
+        thread = self.bot.get_channel(thread_id)
+        if thread is None:
+            try:
+                thread = await self.bot.fetch_channel(thread_id)
+            except discord.NotFound:
+                return None
+        return thread
+
+    async def _edit_notification(self, channel_id: int, message_id: int, via_webhook: bool, **fields):
+        """Edit a notification message, through its channel's webhook if it was sent with one."""
+        if via_webhook and self.webhook_sender:
+            await self.webhook_sender.edit(channel_id, message_id, **fields)
+        else:
+            message = self.bot.get_partial_messageable(channel_id).get_partial_message(message_id)
+            await message.edit(**fields)
+
+    async def _delete_notification(self, channel_id: int, message_id: int, via_webhook: bool):
+        """Delete a notification message, through its channel's webhook if it was sent with one."""
+        if via_webhook and self.webhook_sender:
+            await self.webhook_sender.delete(channel_id, message_id)
+        else:
+            await self.bot.get_partial_messageable(channel_id).get_partial_message(message_id).delete()
+
+    @commands.Cog.listener()
+    async def on_thread_update(self, before: discord.Thread, after: discord.Thread):
+        """Refresh a post's notifications and queued digest entry after a rename or retag."""
+        tags_changed = [tag.id for tag in before.applied_tags] != [tag.id for tag in after.applied_tags]
+        if before.name == after.name and not tags_changed:
+            return
+
+        settings = self._get_forum_settings(after.parent_id)
+        if settings is not None:
+            self._update_digest_entry(after, settings)
+        for entry in self.notification_index.messages_for(after.id):
+            self._queue_notification_edit(entry.message_id, after.id)
+
+    @commands.Cog.listener()
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        """Remove a deleted post from its notifications and digest."""
+        self._drop_digest_entry(payload.thread_id, payload.parent_id)
+        for entry in self.notification_index.messages_for(payload.thread_id):
+            self._queue_notification_edit(entry.message_id, payload.thread_id, deleted=True)
+
+    def _queue_notification_edit(self, message_id: int, thread_id: int, deleted: bool = False):
+        """Edit a notification message after NOTIFICATION_EDIT_DEBOUNCE seconds.
+
+        Further changes to its threads within the window are applied by the
+        same edit, so a user changing tags repeatedly costs one edit.
+        """
+        changes = self._pending_changes.setdefault(message_id, {})
+        changes[thread_id] = deleted or changes.get(thread_id, False)
+        if message_id in self._pending_edits:
+            self.update_stats['coalesced'] += 1
+            return
+        self._pending_edits[message_id] = asyncio.create_task(self._edit_after_debounce(message_id))
+
+    async def _edit_after_debounce(self, message_id: int):
+        await asyncio.sleep(NOTIFICATION_EDIT_DEBOUNCE)
+        await self._apply_notification_edit(message_id)
+
+    async def _apply_notification_edit(self, message_id: int):
+        """Apply the pending changes of a notification message."""
+        # Changes arriving from here on schedule another edit
+        self._pending_edits.pop(message_id, None)
+        changes = self._pending_changes.pop(message_id, {})
+        entry = self.notification_index.get(message_id)
+        if entry is None or not changes:
+            return
+
+        try:
+            await self.pool.run(PRIORITY_SHRINK, self._refresh_notification, entry, changes)
+        except discord.NotFound:
+            # Notification deleted in the meantime
+            self.notification_index.discard(message_id)
+        except Exception:
+            self.update_stats['failed'] += 1
+            log.exception("Error updating notification", extra={'guild_id': entry.guild_id, 'message_id': message_id})
+
+    async def _refresh_notification(self, entry, changes: dict):
+        """Apply a notification's changes under its lock. Run on the pool.
+
+        The lock is taken on the worker, so nothing holds it while waiting
+        for a worker that a shrink of the same message is occupying.
+        """
+        async with entry.lock:
+            await self._refresh_locked(entry, changes)
+
+    async def _refresh_locked(self, entry, changes: dict):
+        """Rebuild the embeds of changed threads in a notification, or delete it if none are left."""
+        for thread_id, deleted in changes.items():
+            if deleted:
+                self.notification_index.remove_thread(entry.message_id, thread_id)
+
+        threads = []
+        for thread_id in list(entry.thread_ids):
+            thread = await self._get_thread(thread_id)
+            if thread is None:
+                self.notification_index.remove_thread(entry.message_id, thread_id)
+            else:
+                threads.append(thread)
+
+        if not threads:
+            await self._delete_notification(entry.channel_id, entry.message_id, entry.via_webhook)
+            self.notification_index.discard(entry.message_id)
+            self.update_stats['deleted'] += 1
+            return
+
+        settings = find_guild_settings(load_settings(), entry.guild_id, legacy=True)
+        fields = {}
+        if entry.shrunk:
+            fields['embeds'] = [self._build_compact_embed(thread, settings) for thread in threads]
+        else:
+            # Unchanged threads keep their embeds, so their previews aren't fetched again
+            message = await self.bot.get_partial_messageable(entry.channel_id).fetch_message(entry.message_id)
+            current = {embed.url: embed for embed in message.embeds}
+            embeds = []
+            for thread in threads:
+                embed = current.get(thread.jump_url)
+                if embed is None or thread.id in changes:
+                    embed = await self._rebuild_embed(thread, settings, embed)
+                embeds.append(embed)
+            fields['embeds'] = embeds
+            if len(threads) < len(message.embeds):
+                # Drop the buttons of removed posts
+                fields['view'] = merge_views(self._build_buttons(thread, settings) for thread in threads)
+
+        await self._edit_notification(entry.channel_id, entry.message_id, entry.via_webhook, **fields)
+        self.update_stats['edited'] += 1
+
+    async def _rebuild_embed(self, thread: discord.Thread, settings: dict, old_embed=None) -> discord.Embed:
+        """Build a thread's full notification embed again, keeping the original timestamp."""
+        try:
+            starter_message = await self._get_starter_message(thread, wait=False)
+        except Exception:
+            starter_message = None
+        embed = self._build_embed(thread, settings, starter_message)
+        if old_embed is not None and old_embed.timestamp:
+            embed.timestamp = old_embed.timestamp
+        return embed
+
+    def _queue_digest_entry(self, thread: discord.Thread, settings: dict, channel_ids=None):
+        """Buffer a new thread for its forum's next digest.
+
+        Args:
+            channel_ids: Channels the post's digest goes to; None for the
+                notification channel (forums in digest mode).
+        """
+        entry = {
+            'thread_id': thread.id,
+            'forum_id': thread.parent_id,
+            'guild_id': thread.guild.id,
+            'title': thread.name,
+            'url': thread.jump_url,
+            'author_id': thread.owner_id,
+            'tags': self._get_tag_names(thread, settings),
+            'channel_ids': channel_ids,
+            'queued_at': time.time()
+        }
+        self._digest_buffer.setdefault(thread.parent_id, []).append(entry)
+        put_record(DIGEST_RECORD_KIND, thread.id, entry)
+
+    def _update_digest_entry(self, thread: discord.Thread, settings: dict):
+        """Update the title and tags of a post waiting for its forum's digest."""
+        for entry in self._digest_buffer.get(thread.parent_id, ()):
+            if entry['thread_id'] == thread.id:
+                entry['title'] = thread.name
+                entry['tags'] = self._get_tag_names(thread, settings)
+                put_record(DIGEST_RECORD_KIND, thread.id, entry)
+                return
+
+    def _drop_digest_entry(self, thread_id: int, forum_id: int):
+        """Remove a deleted post from its forum's next digest."""
+        entries = self._digest_buffer.get(forum_id)
+        if not entries:
+            return
+        remaining = [entry for entry in entries if entry['thread_id'] != thread_id]
+        if len(remaining) == len(entries):
+            return
+        # In place, since a digest being sent holds the same list
+        entries[:] = remaining
+        if not entries:
+            del self._digest_buffer[forum_id]
+        delete_record(DIGEST_RECORD_KIND, thread_id)
+
+    @tasks.loop(seconds=30)
+    async def digest_loop(self):
+        """Send digests for forums whose window has elapsed."""
+        now = time.time()
+        for forum_id, entries in list(self._digest_buffer.items()):
+            # Emptied by deleted posts while an earlier digest was being sent
+            if not entries:
+                continue
+            guild_id = entries[0]['guild_id']
+            settings = find_guild_settings(load_settings(), guild_id, legacy=True)
+            # Forums taken out of digest mode send what's left straight away
+            minutes = settings['digest_forums'].get(str(forum_id), 0)
+            if minutes and entries[0]['queued_at'] + minutes * 60 > now:
+                continue
+
+            # An error here must not stop the loop, and with it every other forum's digests
+            try:
+                await self._send_digest(forum_id, entries, settings)
+            except Exception:
+                log.exception("Error sending digest", extra={'guild_id': guild_id, 'forum_id': forum_id})
+
+    @digest_loop.before_loop
+    async def before_digest_loop(self):
+        await self.bot.wait_until_ready()
+
+    async def _send_digest(self, forum_id: int, entries: list, settings: dict):
+        """Send a forum's buffered threads, one digest message per destination channel."""
+        sent = list(entries)
+        # channel_id -> entries; posts shed under load keep the channels routing chose for them
+        by_channel = {}
+        for entry in sent:
+            for channel_id in entry.get('channel_ids') or [settings['notification_channel_id']]:
+                by_channel.setdefault(channel_id, []).append(entry)
+
+        dropped = by_channel.pop(None, [])
+        if dropped:
+            log.warning(
+                "Dropping digest of %d post(s), no notification channel set", len(dropped),
+                extra={'guild_id': sent[0]['guild_id'], 'forum_id': forum_id}
+            )
+
+        # thread_id -> channels its digest still has to go to
+        retry = {}
+        for channel_id, channel_entries in by_channel.items():
+            try:
+                channel = await self.bot.channel_resolver.resolve(channel_id)
+                await channel.send(embed=self._build_digest_embed(forum_id, channel_entries, settings))
+            except Exception as e:
+                # Keep the entries for this channel and try again on the next check
+                await self._handle_error(settings, f"Failed to send digest for forum (ID: {forum_id}): {str(e)}")
+                for entry in channel_entries:
+                    retry.setdefault(entry['thread_id'], []).append(channel_id)
+
+        # Give up on posts that keep failing, so a dead channel isn't retried forever
+        # channel_id -> posts dropped for it
+        abandoned = {}
+        for entry in sent:
+            channel_ids = retry.get(entry['thread_id'])
+            if not channel_ids:
+                continue
+            entry['attempts'] = entry.get('attempts', 0) + 1
+            if entry['attempts'] >= DIGEST_MAX_ATTEMPTS:
+                del retry[entry['thread_id']]
+                for channel_id in channel_ids:
+                    abandoned[channel_id] = abandoned.get(channel_id, 0) + 1
+
+        # Posts may have been deleted from the buffer while sending
+        done_ids = {entry['thread_id'] for entry in sent if entry['thread_id'] not in retry}
+        entries[:] = [entry for entry in entries if entry['thread_id'] not in done_ids]
+        if not entries and self._digest_buffer.get(forum_id) is entries:
+            del self._digest_buffer[forum_id]
+        for thread_id in done_ids:
+            delete_record(DIGEST_RECORD_KIND, thread_id)
+
+        for entry in entries:
+            channel_ids = retry.get(entry['thread_id'])
+            if channel_ids:
+                if entry.get('channel_ids'):
+                    # Don't send it again to the channels that got it
+                    entry['channel_ids'] = channel_ids
+                put_record(DIGEST_RECORD_KIND, entry['thread_id'], entry)
+
+        for channel_id, count in abandoned.items():
+            await self._handle_error(
+                settings,
+                f"Dropped {count} post(s) from the digest for forum (ID: {forum_id}) after "
+                f"{DIGEST_MAX_ATTEMPTS} failed attempts to send to channel (ID: {channel_id})"
+            )
+
+    def _build_digest_embed(self, forum_id: int, entries: list, settings: dict) -> discord.Embed:
+        """Build a summary embed with one compact line per buffered thread."""
+        template = self._get_template(entries[0]['guild_id'], forum_id, self.bot.get_channel(forum_id), settings)
+
+        lines = []
+        length = 0
+        for index, entry in enumerate(entries):
+            line = f"• [{discord.utils.escape_markdown(entry['title'])}]({entry['url']})"
+            if entry['author_id']:
+                line += f" — <@{entry['author_id']}>"
+            if entry['tags']:
+                line += f" · 🏷️ {' • '.join(entry['tags'])}"
+
+            # Leave room for the "and N more" line
+            if length + len(line) + 1 > EMBED_DESCRIPTION_LIMIT - 40:
+                lines.append(f"…and {len(entries) - index} more")
+                break
+            lines.append(line)
+            length += len(line) + 1
+
+        embed = discord.Embed(
+            title=f"📰 {len(entries)} new post(s) in #{template.forum_name}",
+            url=template.forum_url,
+            description="\n".join(lines),
+            color=template.color,
+            timestamp=discord.utils.utcnow()
+        )
+        embed.set_footer(text=f"Digest for #{template.forum_name}")
+        return embed
+
+    def _get_owner_mention(self, thread: discord.Thread):
+        """Return a mention of the thread's author, built from the ID if the member isn't known."""
+        owner = self.bot.owner_resolver.get(thread)
+        if owner:
+            return owner.mention
+        return f"<@{thread.owner_id}>" if thread.owner_id else None
 
     def _build_compact_embed(self, thread: discord.Thread, settings: dict) -> discord.Embed:
-        forum_name = thread.parent.name if thread.parent else "Unknown Forum"
-        forum_url = f"https://discord.com/channels/{thread.guild.id}/{thread.parent_id}"
+        template = self._get_thread_template(thread, settings)
 
-        author_text = thread.owner.mention if thread.owner else "Unknown"
-        description = f"👤 Posted by {author_text} | [#{forum_name}]({forum_url})"
+        author_text = self._get_owner_mention(thread) or "Unknown"
+        description = f"👤 Posted by {author_text} | [#{template.forum_name}]({template.forum_url})"
 
         return discord.Embed(
             title=thread.name,
             url=thread.jump_url,
             description=description,
-            color=int(settings['embed_color'].replace('#', ''), 16)
-        ).set_footer(text=f"Posted in #{forum_name}")
+            color=template.color
+        ).set_footer(text=template.footer)
 
-    async def _build_embed(self, thread: discord.Thread, settings: dict) -> discord.Embed:
-        """Build the notification embed."""
+    def _build_embed(self, thread: discord.Thread, settings: dict, starter_message) -> discord.Embed:
+        """Build the notification embed.
+
+        Args:
+            starter_message: The thread's first message, or None if unavailable.
+        """
         # Get preview text from the first message
         preview_text = ""
-        starter_message = None
-        try:
-            # Fetch the starter message
-            starter_message = thread.starter_message
-            if not starter_message:
-                # Fetch using thread ID (equals starter message ID)
-                starter_message = await thread.fetch_message(thread.id)
-
-            if starter_message and starter_message.content:
-                preview_length = settings['preview_length']
-                content = starter_message.content.strip()
-                if len(content) > preview_length:
-                    preview_text = f'"{content[:preview_length]}..."'
-                else:
-                    preview_text = f'"{content}"'
-        except Exception as e:
-            print(f"Error fetching thread starter message for '{thread.name}': {e}")
-            preview_text = ""
+        if starter_message and starter_message.content:
+            preview_length = settings['preview_length']
+            content = starter_message.content.strip()
+            if len(content) > preview_length:
+                preview_text = f'"{content[:preview_length]}..."'
+            else:
+                preview_text = f'"{content}"'
 
         # Extract attachment info
         media_type, media_url, has_video = self._get_media_info(starter_message)
 
-        # Get forum name
-        forum_name = thread.parent.name if thread.parent else "Unknown Forum"
+        # Get cached forum name, URL, color and tags
+        template = self._get_thread_template(thread, settings)
 
         # Extract tag names
-        tag_names = self._get_tag_names(thread)
+        tag_names = self._get_tag_names(thread, settings)
 
         # Build description with sections
         description_parts = []
@@ -137,25 +1198,27 @@ class ForumListener(commands.Cog):
             title=thread.name,
             url=thread.jump_url,
             description=description,
-            color=int(settings['embed_color'].replace('#', ''), 16),
+            color=template.color,
             timestamp=discord.utils.utcnow()
         )
 
         # Add footer
-        embed.set_footer(text=f"Posted in #{forum_name}")
+        embed.set_footer(text=template.footer)
 
         # Add avatar thumbnail
-        if thread.owner:
+        owner = self.bot.owner_resolver.get(thread)
+        if owner:
             try:
-                embed.set_thumbnail(url=thread.owner.display_avatar.url)
+                embed.set_thumbnail(url=owner.display_avatar.url)
             except Exception as e:
-                print(f"Error setting avatar: {e}")
+                log.warning("Error setting avatar: %s", e)
 
         # Add author field
-        if thread.owner:
+        author_text = self._get_owner_mention(thread)
+        if author_text:
             embed.add_field(
                 name="👤 Posted by",
-                value=thread.owner.mention,
+                value=author_text,
                 inline=False
             )
 
@@ -164,21 +1227,20 @@ class ForumListener(commands.Cog):
             try:
                 embed.set_image(url=media_url)
             except Exception as e:
-                print(f"Error setting media image: {e}")
+                log.warning("Error setting media image: %s", e)
 
         return embed
 
-    def _build_buttons(self, thread: discord.Thread) -> discord.ui.View:
+    def _build_buttons(self, thread: discord.Thread, settings: dict) -> discord.ui.View:
         """Build the button view with link buttons."""
         view = discord.ui.View()
 
         # View Forum button
         if thread.parent:
-            forum_url = f"https://discord.com/channels/{thread.guild.id}/{thread.parent_id}"
             view.add_item(
                 discord.ui.Button(
                     label="📁 View Forum",
-                    url=forum_url,
+                    url=self._get_thread_template(thread, settings).forum_url,
                     style=discord.ButtonStyle.link
                 )
             )
@@ -210,10 +1272,10 @@ class ForumListener(commands.Cog):
 
             return (None, None, False)
         except Exception as e:
-            print(f"Error getting media info: {e}")
+            log.warning("Error getting media info: %s", e)
             return (None, None, False)
 
-    def _get_tag_names(self, thread: discord.Thread) -> list:
+    def _get_tag_names(self, thread: discord.Thread, settings: dict) -> list:
         """Resolve thread tag IDs to tag names.
 
         Returns:
@@ -223,11 +1285,8 @@ class ForumListener(commands.Cog):
             if not hasattr(thread, 'applied_tags') or not thread.applied_tags:
                 return []
 
-            if not thread.parent or not hasattr(thread.parent, 'available_tags'):
-                return []
-
-            # Build tag lookup dictionary
-            tag_lookup = {tag.id: tag.name for tag in thread.parent.available_tags}
+            # Tag lookup dictionary, cached per forum
+            tag_lookup = self._get_thread_template(thread, settings).tag_lookup
 
             # Resolve tag IDs to names
             tag_names = []
@@ -237,30 +1296,80 @@ class ForumListener(commands.Cog):
 
             return tag_names
         except Exception as e:
-            print(f"Error getting tag names: {e}")
+            log.warning("Error getting tag names: %s", e)
             return []
 
     async def _handle_error(self, settings: dict, error_message: str):
-        """Handle and report errors."""
-        print(f"Error: {error_message}")
-
-        # Try to send to error channel if configured
+        """Handle and report errors. Repeats are held back for the periodic summary."""
         error_channel_id = settings['error_channel_id']
+        if not self.error_aggregator.report(error_channel_id, error_message):
+            return
+
+        log.error(error_message, extra={'event': 'error_report'})
+
+        # Post to the error channel if configured, after pending notifications and shrinks
         if error_channel_id:
             try:
-                error_channel = self.bot.get_channel(error_channel_id)
-                if not error_channel:
-                    error_channel = await self.bot.fetch_channel(error_channel_id)
+                self.pool.submit(PRIORITY_ERROR_REPORT, self._send_error_report, error_channel_id, error_message)
+            except asyncio.QueueFull:
+                self.shed_stats['error_report'] += 1
+                log.warning(
+                    "Error not posted to error channel, notification pipeline overloaded", extra={'event': 'load_shed'}
+                )
+
+    async def _send_error_report(self, error_channel_id: int, error_message: str):
+        """Post an error to the error channel. Run on the pool."""
+        try:
+            error_channel = await self.bot.channel_resolver.resolve(error_channel_id)
+
+            embed = discord.Embed(
+                title="⚠️ Forum Notifier Error",
+                description=error_message,
+                color=0xFF0000,
+                timestamp=discord.utils.utcnow()
+            )
+            await error_channel.send(embed=embed)
+        except Exception as e:
+            log.warning("Failed to send error to error channel: %s", e, extra={'channel_id': error_channel_id})
 
+    @tasks.loop(seconds=60)
+    async def error_summary_loop(self):
+        """Post one summary per error channel of errors repeated since the last summary."""
+        for error_channel_id, summaries in self.error_aggregator.drain().items():
+            lines = []
+            for message, count, first_seen, last_seen in summaries:
+                first = datetime.datetime.fromtimestamp(first_seen, datetime.timezone.utc)
+                last = datetime.datetime.fromtimestamp(last_seen, datetime.timezone.utc)
+                log.error("Error repeated %dx: %s", count, message, extra={'event': 'error_summary'})
+                lines.append(
+                    f"**{count}x** {message}\n"
+                    f"First {discord.utils.format_dt(first, 'T')} · Last {discord.utils.format_dt(last, 'T')}"
+                )
+
+            if not error_channel_id:
+                continue
+
+            description = "\n\n".join(lines)
+            if len(description) > EMBED_DESCRIPTION_LIMIT:
+                description = description[:EMBED_DESCRIPTION_LIMIT - 1] + "…"
+
+            try:
+                error_channel = await self.bot.channel_resolver.resolve(error_channel_id)
                 embed = discord.Embed(
-                    title="⚠️ Forum Notifier Error",
-                    description=error_message,
+                    title="⚠️ Repeated Forum Notifier Errors",
+                    description=description,
                     color=0xFF0000,
                     timestamp=discord.utils.utcnow()
                 )
                 await error_channel.send(embed=embed)
             except Exception as e:
-                print(f"Failed to send error to error channel: {e}")
+                log.warning(
+                    "Failed to send error summary to error channel: %s", e, extra={'channel_id': error_channel_id}
+                )
+
+    @error_summary_loop.before_loop
+    async def before_error_summary_loop(self):
+        await self.bot.wait_until_ready()
 
 
 async def setup(bot):
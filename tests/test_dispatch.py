@@ -0,0 +1,87 @@
+import asyncio
+import unittest
+
+import discord
+
+from utils.dispatch import DispatchQueue
+
+
+class FakeChannel:
+    def __init__(self, channel_id):
+        self.id = channel_id
+
+
+class DispatchQueueTest(unittest.IsolatedAsyncioTestCase):
+    """Notifications are packed per channel and identity into as few messages as allowed."""
+
+    def setUp(self):
+        self.sent = []
+        self.callbacks = []
+        self.fail = False
+
+    async def _sender(self, channel, embeds, view, identity):
+        if self.fail:
+            raise discord.DiscordException("send failed")
+        message = (channel.id, identity, [embed.title for embed in embeds])
+        self.sent.append(message)
+        return message
+
+    def _queue(self, **kwargs):
+        return DispatchQueue(
+            sender=self._sender, on_sent=lambda message, keys: self.callbacks.append(keys), **kwargs
+        )
+
+    async def test_batches_within_flush_interval(self):
+        queue = self._queue(flush_interval=0.05)
+        channel = FakeChannel(1)
+        results = await asyncio.gather(*(
+            queue.send(channel, discord.Embed(title=str(i)), key=i) for i in range(3)
+        ))
+        self.assertEqual(self.sent, [(1, None, ['0', '1', '2'])])
+        self.assertEqual(results, [self.sent[0]] * 3)
+        self.assertEqual(self.callbacks, [[0, 1, 2]])
+        self.assertEqual(queue.stats['messages'], 1)
+        self.assertEqual(queue.stats['messages_saved'], 2)
+        self.assertEqual(queue.depth(), 0)
+
+    async def test_full_batch_sent_without_waiting(self):
+        queue = self._queue(flush_interval=10, max_batch=2)
+        channel = FakeChannel(1)
+        sends = [asyncio.create_task(queue.send(channel, discord.Embed(title=str(i)))) for i in range(3)]
+        await asyncio.wait_for(asyncio.gather(*sends[:2]), timeout=1)
+        self.assertEqual(self.sent, [(1, None, ['0', '1'])])
+        # The remainder waits for the interval unless flushed
+        self.assertEqual(queue.depth(), 1)
+        await queue.flush()
+        await sends[2]
+        self.assertEqual(self.sent[1], (1, None, ['2']))
+
+    async def test_channels_and_identities_batched_separately(self):
+        queue = self._queue(flush_interval=0.05)
+        await asyncio.gather(
+            queue.send(FakeChannel(1), discord.Embed(title='a')),
+            queue.send(FakeChannel(2), discord.Embed(title='b')),
+            queue.send(FakeChannel(1), discord.Embed(title='c'), identity=('Help Desk', None)),
+            queue.send(FakeChannel(1), discord.Embed(title='d')),
+        )
+        self.assertCountEqual(self.sent, [
+            (1, None, ['a', 'd']),
+            (2, None, ['b']),
+            (1, ('Help Desk', None), ['c']),
+        ])
+
+    async def test_failed_batch_raises_for_every_notification(self):
+        queue = self._queue(flush_interval=0.05)
+        self.fail = True
+        results = await asyncio.gather(
+            queue.send(FakeChannel(1), discord.Embed(title='a')),
+            queue.send(FakeChannel(1), discord.Embed(title='b')),
+            return_exceptions=True,
+        )
+        self.assertTrue(all(isinstance(result, discord.DiscordException) for result in results))
+        self.assertEqual(queue.stats['failed'], 2)
+        self.assertEqual(self.callbacks, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+from unittest import mock
+
+from utils.errors import ErrorAggregator, fingerprint
+
+
+class ErrorAggregatorTest(unittest.TestCase):
+    """Repeats of an error are counted instead of reported, then summarized."""
+
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch('utils.errors.time.time', side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_fingerprint_masks_ids(self):
+        self.assertEqual(
+            fingerprint("Missing access to channel 123456789"), fingerprint("Missing access to channel 987654321")
+        )
+        self.assertNotEqual(fingerprint("Missing access"), fingerprint("Unknown channel"))
+
+    def test_repeats_suppressed_within_window(self):
+        errors = ErrorAggregator(window=300)
+        self.assertTrue(errors.report(1, "Missing access to thread 123456789"))
+        self.now += 10
+        self.assertFalse(errors.report(1, "Missing access to thread 223456789"))
+        self.assertFalse(errors.report(1, "Missing access to thread 323456789"))
+        # Other channels and other errors are reported separately
+        self.assertTrue(errors.report(2, "Missing access to thread 123456789"))
+        self.assertTrue(errors.report(1, "Unknown channel"))
+        self.assertEqual(errors.stats, {'reported': 3, 'suppressed': 2, 'evicted': 0})
+
+        self.assertEqual(errors.drain(), {1: [("Missing access to thread 323456789", 2, 1000.0, 1010.0)]})
+        self.assertEqual(errors.drain(), {})
+
+        # After the window the error is reported again
+        self.now += 300
+        self.assertTrue(errors.report(1, "Missing access to thread 123456789"))
+
+    def test_quiet_errors_forgotten(self):
+        errors = ErrorAggregator(window=300)
+        errors.report(1, "Unknown channel")
+        self.now += 300
+        errors.drain()
+        self.assertEqual(len(errors._records), 0)
+
+    def test_least_recently_seen_evicted(self):
+        errors = ErrorAggregator(max_entries=2)
+        errors.report(1, "first")
+        errors.report(1, "second")
+        errors.report(1, "first")
+        errors.report(1, "third")
+        self.assertEqual(errors.stats['evicted'], 1)
+        # "second" was dropped, so it is reported again straight away
+        self.assertTrue(errors.report(1, "second"))
+        self.assertFalse(errors.report(1, "third"))
+
+
+if __name__ == '__main__':
+    unittest.main()
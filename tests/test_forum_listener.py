@@ -0,0 +1,162 @@
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from fakes import FakeBot, FakeForumChannel, FakeGuild, FakeHTTP, FakeTextChannel, make_thread  # noqa: E402
+
+from cogs.forum_listener import (  # noqa: E402
+    DIGEST_MAX_ATTEMPTS, DIGEST_RECORD_KIND, WATERMARK_RECORD_KIND, ForumListener
+)
+from utils import storage  # noqa: E402
+from utils.workers import PRIORITY_NOTIFICATION, WorkPool  # noqa: E402
+
+GUILD_ID = 1
+NOTIFICATION_CHANNEL_ID = 2
+ROUTED_CHANNEL_ID = 3
+# Routed to, but deleted
+MISSING_CHANNEL_ID = 4
+FORUM_ID = 10
+
+
+class ListenerTestCase(unittest.IsolatedAsyncioTestCase):
+    """A ForumListener on fake Discord objects, with settings and records in a temporary directory."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._state = (
+            storage._backend, storage._settings, storage._settings_version, storage._save_task,
+            storage._pending_records
+        )
+        storage._backend = storage.JSONStorage(Path(self._tmp.name) / "settings.json")
+        storage._settings = None
+        storage._save_task = None
+        storage._pending_records = []
+
+        http = FakeHTTP(latency=0, rate_limit=None)
+        self.bot = FakeBot(http)
+        guild = FakeGuild(GUILD_ID, http)
+        self.notifications = self.bot.add_channel(FakeTextChannel(NOTIFICATION_CHANNEL_ID, guild, http))
+        self.routed = self.bot.add_channel(FakeTextChannel(ROUTED_CHANNEL_ID, guild, http))
+        self.forum = self.bot.add_channel(FakeForumChannel(FORUM_ID, guild))
+        self.http = http
+
+        self.settings = storage.load_settings()
+        self.guild_settings = storage.get_guild_settings(self.settings, GUILD_ID)
+        self.guild_settings['notification_channel_id'] = NOTIFICATION_CHANNEL_ID
+        self.guild_settings['monitored_forums'] = [FORUM_ID]
+        storage.save_settings(self.settings)
+
+        self.listener = ForumListener(self.bot)
+
+    async def asyncTearDown(self):
+        await storage.flush_storage()
+
+    def tearDown(self):
+        (
+            storage._backend, storage._settings, storage._settings_version, storage._save_task,
+            storage._pending_records
+        ) = self._state
+        self._tmp.cleanup()
+
+    def _new_thread(self):
+        thread = make_thread(self.forum, self.http)
+        self.bot.add_channel(thread)
+        return thread
+
+
+class ShedPostDigestTest(ListenerTestCase):
+    """Posts shed under overload reach their routed channels, and give up on dead ones."""
+
+    def setUp(self):
+        super().setUp()
+        for channel_id in (ROUTED_CHANNEL_ID, MISSING_CHANNEL_ID):
+            self.guild_settings['routes'].append(
+                {'forum_id': FORUM_ID, 'tag_id': None, 'role_id': None, 'channel_id': channel_id}
+            )
+        storage.save_settings(self.settings)
+        # A full queue whose workers never start, so every new post is shed to the digest
+        self.listener.pool = WorkPool(workers=1, max_queue=1)
+
+    async def _noop(self):
+        pass
+
+    async def test_shed_post_sent_to_routes_then_dropped_for_dead_channel(self):
+        self.listener.pool.submit(PRIORITY_NOTIFICATION, self._noop)
+        thread = self._new_thread()
+
+        await self.listener.on_thread_create(thread)
+        self.assertEqual(self.listener.shed_stats['digest'], 1)
+        [entry] = self.listener._digest_buffer[FORUM_ID]
+        self.assertEqual(sorted(entry['channel_ids']), [ROUTED_CHANNEL_ID, MISSING_CHANNEL_ID])
+
+        with mock.patch.object(self.listener, '_handle_error') as handle_error:
+            await self.listener.digest_loop()
+            self.assertEqual(self.routed.sent, 1)
+            self.assertEqual(self.notifications.sent, 0)
+            # Only the channel that failed is retried
+            self.assertEqual(entry['channel_ids'], [MISSING_CHANNEL_ID])
+
+            for _ in range(DIGEST_MAX_ATTEMPTS - 1):
+                await self.listener.digest_loop()
+            self.assertEqual(self.routed.sent, 1)
+            self.assertEqual(self.listener._digest_buffer, {})
+
+            messages = [call.args[1] for call in handle_error.await_args_list]
+            self.assertEqual(len(messages), DIGEST_MAX_ATTEMPTS + 1)
+            self.assertIn(f"after {DIGEST_MAX_ATTEMPTS} failed attempts", messages[-1])
+
+        # Nothing left to resend after a restart
+        await storage.flush_storage()
+        self.assertEqual(storage.load_records(DIGEST_RECORD_KIND), {})
+
+        # Later checks don't touch the dropped post again
+        await self.listener.digest_loop()
+        self.assertEqual(self.routed.sent, 1)
+
+
+class CatchUpWatermarkTest(ListenerTestCase):
+    """Catch-up marks only move past posts that can't have been missed."""
+
+    def setUp(self):
+        super().setUp()
+        # Announced in summaries, so live posts need no sends
+        self.guild_settings['digest_forums'][str(FORUM_ID)] = 60
+        storage.save_settings(self.settings)
+        self.forum.threads = []
+
+    def _mark(self):
+        return self.listener._watermarks.get(FORUM_ID, (None, None))[0]
+
+    async def test_uncached_forum_keeps_its_mark(self):
+        self.listener._watermarks[FORUM_ID] = (1, GUILD_ID)
+        del self.bot.channels[FORUM_ID]
+        await self.listener._catch_up()
+        self.assertEqual(self._mark(), 1)
+
+        self.bot.add_channel(self.forum)
+        await self.listener._catch_up()
+        self.assertGreater(self._mark(), 1)
+
+    async def test_live_posts_advance_mark_until_disconnect(self):
+        # Marks only move for forums caught up since the last disconnect
+        await self.listener.on_thread_create(self._new_thread())
+        self.assertIsNone(self._mark())
+
+        await self.listener._catch_up()
+        thread = self._new_thread()
+        await self.listener.on_thread_create(thread)
+        self.assertEqual(self._mark(), thread.id)
+        await storage.flush_storage()
+        self.assertEqual(storage.load_records(WATERMARK_RECORD_KIND), {str(FORUM_ID): [thread.id, GUILD_ID]})
+
+        await self.listener.on_disconnect()
+        await self.listener.on_thread_create(self._new_thread())
+        self.assertEqual(self._mark(), thread.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from utils import storage
+from utils.idempotency import NotifiedThreads
+
+
+class NotifiedThreadsTest(unittest.TestCase):
+    """Announced threads are remembered until they expire or are evicted, across restarts."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._state = (storage._backend, storage._pending_records)
+        # No running loop, so record changes are written straight away
+        storage._backend = storage.JSONStorage(Path(self._tmp.name) / "settings.json")
+        storage._pending_records = []
+
+    def tearDown(self):
+        storage._backend, storage._pending_records = self._state
+        self._tmp.cleanup()
+
+    def _stored(self):
+        return sorted(int(key) for key in storage.load_records(NotifiedThreads.RECORD_KIND))
+
+    def test_add_rejects_duplicates(self):
+        threads = NotifiedThreads()
+        self.assertTrue(threads.add(1, guild_id=5))
+        self.assertFalse(threads.add(1, guild_id=5))
+        self.assertIn(1, threads)
+        self.assertEqual(threads.stats['duplicates'], 1)
+
+        threads.discard(1)
+        self.assertNotIn(1, threads)
+        self.assertEqual(self._stored(), [])
+        self.assertTrue(threads.add(1))
+
+    def test_evicts_oldest_beyond_max_entries(self):
+        threads = NotifiedThreads(max_entries=2)
+        for thread_id in (1, 2, 3):
+            threads.add(thread_id)
+        self.assertEqual(len(threads), 2)
+        self.assertNotIn(1, threads)
+        self.assertEqual(threads.stats['evicted'], 1)
+        self.assertEqual(self._stored(), [2, 3])
+
+    def test_expired_entries_dropped_and_readded(self):
+        threads = NotifiedThreads(ttl=60)
+        with mock.patch('utils.idempotency.time.time', return_value=time.time() - 120):
+            threads.add(1)
+            threads.add(2)
+        self.assertNotIn(1, threads)
+        # A stale entry does not block announcing the thread again
+        self.assertTrue(threads.add(1))
+        self.assertIn(1, threads)
+        # Adding trimmed the other expired entry from the front
+        self.assertEqual(len(threads), 1)
+        self.assertEqual(threads.stats['expired'], 1)
+        self.assertEqual(self._stored(), [1])
+
+    def test_load_restores_owned_entries(self):
+        threads = NotifiedThreads(ttl=60)
+        threads.add(1, guild_id=5)
+        threads.add(2, guild_id=6)
+        # Saved before sharding, without a guild ID
+        storage.put_record(NotifiedThreads.RECORD_KIND, 3, time.time())
+        storage.put_record(NotifiedThreads.RECORD_KIND, 4, time.time() - 120)
+
+        restored = NotifiedThreads(ttl=60)
+        restored.load(owns=lambda guild_id: guild_id in (5, None))
+        self.assertIn(1, restored)
+        self.assertNotIn(2, restored)
+        self.assertIn(3, restored)
+        self.assertNotIn(4, restored)
+        self.assertEqual(restored.stats['expired'], 1)
+        # The expired entry is removed from storage too
+        self.assertEqual(self._stored(), [1, 2, 3])
+
+
+if __name__ == '__main__':
+    unittest.main()
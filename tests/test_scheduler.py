@@ -0,0 +1,92 @@
+import asyncio
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+from utils import storage
+from utils.scheduler import ShrinkScheduler
+
+
+class ShrinkSchedulerTest(unittest.IsolatedAsyncioTestCase):
+    """Shrinks run when due, and pending ones survive a stop or a handover to a new handler."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._state = (storage._backend, storage._save_task, storage._pending_records)
+        storage._backend = storage.JSONStorage(Path(self._tmp.name) / "settings.json")
+        storage._save_task = None
+        storage._pending_records = []
+        self.ran = []
+
+    def tearDown(self):
+        storage._backend, storage._save_task, storage._pending_records = self._state
+        self._tmp.cleanup()
+
+    async def _handler(self, job):
+        self.ran.append(job.message_id)
+
+    async def _wait_for(self, count):
+        for _ in range(100):
+            if len(self.ran) >= count:
+                return
+            await asyncio.sleep(0.01)
+        self.fail("shrinks never ran")
+
+    async def test_runs_due_jobs_in_order(self):
+        scheduler = ShrinkScheduler(self._handler)
+        scheduler.schedule(1, 101, [11], delay=0.05)
+        scheduler.schedule(1, 100, [10], delay=0)
+        scheduler.schedule(1, 102, [12], delay=60)
+        scheduler.start()
+        await self._wait_for(2)
+        await scheduler.stop()
+        self.assertEqual(self.ran, [100, 101])
+        self.assertEqual(len(scheduler), 1)
+
+        await storage.flush_storage()
+        self.assertEqual(list(storage.load_records(ShrinkScheduler.RECORD_KIND)), ['102'])
+
+    async def test_stop_keeps_jobs_for_next_start(self):
+        release = asyncio.Event()
+
+        async def blocking_handler(job):
+            await release.wait()
+
+        scheduler = ShrinkScheduler(blocking_handler, workers=1)
+        for message_id in (100, 101, 102):
+            scheduler.schedule(1, message_id, [message_id], delay=0, via_webhook=True, guild_id=5)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        # One job is running, the others are queued for the worker
+        self.assertEqual(len(scheduler), 0)
+        await scheduler.stop()
+        self.assertEqual(len(scheduler), 3)
+        await storage.flush_storage()
+
+        # A reloaded cog picks the jobs up from storage with a new handler
+        resumed = ShrinkScheduler(self._handler)
+        resumed.load(owns=lambda guild_id: guild_id == 5)
+        self.assertEqual(len(resumed), 3)
+        resumed.start()
+        await self._wait_for(3)
+        await resumed.stop()
+        self.assertEqual(sorted(self.ran), [100, 101, 102])
+
+    async def test_load_skips_other_processes_jobs(self):
+        storage.put_record(ShrinkScheduler.RECORD_KIND, 100, [time.time(), 1, [10], False, 5])
+        storage.put_record(ShrinkScheduler.RECORD_KIND, 101, [time.time(), 1, [11], False, 6])
+        # Saved before batching, webhooks and sharding
+        storage.put_record(ShrinkScheduler.RECORD_KIND, 102, [time.time(), 1, 12])
+        await storage.flush_storage()
+
+        scheduler = ShrinkScheduler(self._handler)
+        scheduler.load(owns=lambda guild_id: guild_id in (5, None))
+        jobs = sorted(scheduler._heap, key=lambda job: job.message_id)
+        self.assertEqual([job.message_id for job in jobs], [100, 102])
+        self.assertEqual(jobs[1].thread_ids, (12,))
+        self.assertFalse(jobs[1].via_webhook)
+
+
+if __name__ == '__main__':
+    unittest.main()
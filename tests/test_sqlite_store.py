@@ -0,0 +1,120 @@
+import json
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from utils import storage
+from utils.sqlite_store import MIGRATIONS, SQLiteStorage
+
+
+class SQLiteStorageRoundTripTest(unittest.TestCase):
+    """Legacy import, claiming, configuration changes and reloading through the SQLite engine."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmp.name)
+        self.db_path = self.dir / "settings.db"
+        self.json_path = self.dir / "settings.json"
+        # Flat settings.json from before per-guild support
+        self.json_path.write_text(json.dumps({
+            "notification_channel_id": 111,
+            "error_channel_id": 222,
+            "monitored_forums": [10, 20],
+            "embed_color": "#5865F2",
+            "preview_length": 50,
+        }))
+        self.storage = SQLiteStorage(self.db_path, import_from=self.json_path)
+        # Route the module-level settings cache to this database
+        self._saved_state = (storage._backend, storage._settings, storage._settings_version)
+        storage._backend = self.storage
+        storage._settings = None
+
+    def tearDown(self):
+        storage._backend, storage._settings, storage._settings_version = self._saved_state
+        self.storage.close()
+        self._tmp.cleanup()
+
+    def test_migrations_applied(self):
+        version = self.storage._conn.execute("PRAGMA user_version").fetchone()[0]
+        self.assertEqual(version, len(MIGRATIONS))
+        rows = self.storage._conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        tables = {row[0] for row in rows}
+        self.assertEqual(tables, {'guild_config', 'monitored_forums', 'records', 'notification_routes'})
+
+    def test_import_claim_configure_reload(self):
+        settings = storage.load_settings()
+        self.assertEqual(list(settings['guilds']), [storage.LEGACY_GUILD_KEY])
+        self.assertEqual(settings['guilds'][storage.LEGACY_GUILD_KEY]['monitored_forums'], [10, 20])
+
+        self.assertTrue(storage.claim_legacy_settings(1))
+        self.assertFalse(storage.claim_legacy_settings(2))
+
+        settings = storage.load_settings()
+        guild_settings = storage.get_guild_settings(settings, 1)
+        guild_settings['monitored_forums'].remove(20)
+        guild_settings['monitored_forums'].append(30)
+        guild_settings['digest_forums']['30'] = 15
+        guild_settings['forum_identities']['10'] = {'username': 'Help Desk', 'avatar_url': None}
+        guild_settings['routes'].append({'forum_id': 10, 'tag_id': 5, 'role_id': None, 'channel_id': 333})
+        guild_settings['shrink_delay'] = 60
+        storage.save_settings(settings)
+
+        reopened = SQLiteStorage(self.db_path)
+        try:
+            reloaded = reopened.load()
+        finally:
+            reopened.close()
+
+        self.assertEqual(list(reloaded['guilds']), ['1'])
+        guild_settings = reloaded['guilds']['1']
+        self.assertEqual(guild_settings['notification_channel_id'], 111)
+        self.assertEqual(guild_settings['embed_color'], "#5865F2")
+        self.assertEqual(guild_settings['preview_length'], 50)
+        self.assertEqual(guild_settings['shrink_delay'], 60)
+        self.assertEqual(sorted(guild_settings['monitored_forums']), [10, 30])
+        self.assertEqual(guild_settings['digest_forums'], {'30': 15})
+        self.assertEqual(guild_settings['forum_identities'], {'10': {'username': 'Help Desk', 'avatar_url': None}})
+        self.assertEqual(
+            guild_settings['routes'], [{'forum_id': 10, 'tag_id': 5, 'role_id': None, 'channel_id': 333}]
+        )
+
+    def test_lookup_before_claim_keeps_legacy_settings(self):
+        # e.g. a post handled while members are chunked, before on_ready claims the settings
+        guild_settings = storage.find_guild_settings(storage.load_settings(), 1, legacy=True)
+        self.assertEqual(guild_settings['embed_color'], "#5865F2")
+        # Commands never see settings that may belong to another guild
+        guild_settings = storage.find_guild_settings(storage.load_settings(), 1)
+        self.assertEqual(guild_settings['embed_color'], storage.DEFAULT_GUILD_SETTINGS['embed_color'])
+        self.assertEqual(list(storage.load_settings()['guilds']), [storage.LEGACY_GUILD_KEY])
+        self.assertTrue(storage.claim_legacy_settings(1))
+
+    def test_records_round_trip(self):
+        self.storage.apply_records([("shrink_jobs", "1", [1.5, 2, [3]]), ("shrink_jobs", "2", [4])])
+        self.storage.apply_records([("shrink_jobs", "2", None)])
+        self.assertEqual(self.storage.load_records("shrink_jobs"), {"1": [1.5, 2, [3]]})
+
+    def test_reads_not_blocked_by_waiting_writer(self):
+        # Another process holds the write lock; our writer waits for it
+        other = sqlite3.connect(self.db_path, isolation_level=None)
+        other.execute("BEGIN IMMEDIATE")
+        writer = threading.Thread(target=self.storage.apply_records, args=([("shrink_jobs", "1", [1])],))
+        writer.start()
+        try:
+            time.sleep(0.2)
+            start = time.monotonic()
+            self.storage.version()
+            self.storage.load()
+            self.storage.load_records("shrink_jobs")
+            self.assertLess(time.monotonic() - start, 1.0)
+        finally:
+            other.execute("COMMIT")
+            other.close()
+            writer.join()
+        self.assertEqual(self.storage.load_records("shrink_jobs"), {"1": [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+import asyncio
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+
+from utils import storage
+
+
+class SlowJSONStorage(storage.JSONStorage):
+    """JSONStorage whose writes block until released, to change things mid-write."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def save(self, settings):
+        self.writing.set()
+        self.release.wait(5)
+        super().save(settings)
+
+    def apply_records(self, changes):
+        self.writing.set()
+        self.release.wait(5)
+        super().apply_records(changes)
+
+
+class DebouncedWriterTest(unittest.IsolatedAsyncioTestCase):
+    """Settings and records saved while a write is running still reach disk."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "settings.json"
+        self.backend = SlowJSONStorage(self.path)
+        self.backend.release.set()
+        self._state = (
+            storage._backend, storage._settings, storage._settings_version, storage._dirty,
+            storage._save_task, storage._pending_records, storage.SAVE_DELAY
+        )
+        storage._backend = self.backend
+        storage._settings = None
+        storage._dirty = False
+        storage._save_task = None
+        storage._pending_records = []
+        storage.SAVE_DELAY = 0.01
+
+    def tearDown(self):
+        self.backend.release.set()
+        (
+            storage._backend, storage._settings, storage._settings_version, storage._dirty,
+            storage._save_task, storage._pending_records, storage.SAVE_DELAY
+        ) = self._state
+        self._tmp.cleanup()
+
+    async def _wait_for_write(self):
+        await asyncio.get_running_loop().run_in_executor(None, self.backend.writing.wait, 5)
+
+    async def _wait_until_idle(self):
+        for _ in range(200):
+            if storage._save_task is None or storage._save_task.done():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("writer never finished")
+
+    def _saved_color(self):
+        return json.loads(self.path.read_text())['guilds']['1']['embed_color']
+
+    async def test_settings_saved_during_write(self):
+        settings = storage.load_settings()
+        self.backend.writing.clear()
+        self.backend.release.clear()
+
+        storage.get_guild_settings(settings, 1)['embed_color'] = "#111111"
+        storage.save_settings(settings)
+        await self._wait_for_write()
+
+        # Made while the first snapshot is being written
+        storage.get_guild_settings(settings, 1)['embed_color'] = "#222222"
+        storage.save_settings(settings)
+        self.backend.release.set()
+
+        await self._wait_until_idle()
+        self.assertFalse(storage._dirty)
+        self.assertEqual(self._saved_color(), "#222222")
+
+    async def test_records_queued_during_write(self):
+        storage.load_settings()
+        self.backend.writing.clear()
+        self.backend.release.clear()
+
+        storage.put_record("shrink_jobs", 1, [1])
+        await self._wait_for_write()
+        storage.put_record("shrink_jobs", 2, [2])
+        storage.delete_record("shrink_jobs", 1)
+        self.backend.release.set()
+
+        await self._wait_until_idle()
+        self.assertEqual(storage._pending_records, [])
+        records = json.loads(self.path.with_name("shrink_jobs.json").read_text())
+        self.assertEqual(records, {"2": [2]})
+
+    async def test_flush_writes_everything(self):
+        settings = storage.load_settings()
+        storage.get_guild_settings(settings, 1)['embed_color'] = "#333333"
+        storage.save_settings(settings)
+        storage.put_record("shrink_jobs", 3, [3])
+        await storage.flush_storage()
+        self.assertEqual(self._saved_color(), "#333333")
+        self.assertEqual(storage.load_records("shrink_jobs"), {"3": [3]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import asyncio
+import unittest
+from unittest import mock
+
+import aiohttp
+
+from utils.webhooks import WebhookSender
+
+
+class FlakyRequest:
+    """Fails with the given errors, then returns 'ok'."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+class WithRetriesTest(unittest.IsolatedAsyncioTestCase):
+    """Edits and deletes are retried after any transient error, sends only if nothing went out."""
+
+    def setUp(self):
+        self.sender = WebhookSender(bot=None, retries=2)
+        patcher = mock.patch('utils.webhooks.asyncio.sleep', new=mock.AsyncMock())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _connect_error(self):
+        return aiohttp.ClientConnectorError(mock.Mock(), OSError("connection refused"))
+
+    async def test_idempotent_request_retried(self):
+        request = FlakyRequest(asyncio.TimeoutError(), aiohttp.ServerDisconnectedError())
+        self.assertEqual(await self.sender._with_retries(request), 'ok')
+        self.assertEqual(request.calls, 3)
+        self.assertEqual(self.sender.stats['retries'], 2)
+
+    async def test_send_not_retried_after_it_may_have_gone_out(self):
+        for error in (asyncio.TimeoutError(), aiohttp.ServerDisconnectedError()):
+            request = FlakyRequest(error)
+            with self.assertRaises(type(error)):
+                await self.sender._with_retries(request, idempotent=False)
+            self.assertEqual(request.calls, 1)
+
+    async def test_send_retried_when_connection_failed(self):
+        request = FlakyRequest(self._connect_error())
+        self.assertEqual(await self.sender._with_retries(request, idempotent=False), 'ok')
+        self.assertEqual(request.calls, 2)
+
+    async def test_gives_up_after_retries(self):
+        request = FlakyRequest(*(self._connect_error() for _ in range(3)))
+        with self.assertRaises(aiohttp.ClientConnectorError):
+            await self.sender._with_retries(request)
+        self.assertEqual(request.calls, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
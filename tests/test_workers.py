@@ -0,0 +1,74 @@
+import asyncio
+import unittest
+
+from utils.workers import PRIORITY_ERROR_REPORT, PRIORITY_NOTIFICATION, PRIORITY_SHRINK, WorkPool
+
+
+class WorkPoolTest(unittest.IsolatedAsyncioTestCase):
+    """Jobs run highest priority first and submissions are shed once the queue is full."""
+
+    async def asyncSetUp(self):
+        self.ran = []
+
+    async def _job(self, name):
+        self.ran.append(name)
+        return name
+
+    async def test_priority_then_submission_order(self):
+        pool = WorkPool(workers=1, max_queue=10)
+        futures = [
+            pool.submit(PRIORITY_ERROR_REPORT, self._job, 'error'),
+            pool.submit(PRIORITY_SHRINK, self._job, 'shrink 1'),
+            pool.submit(PRIORITY_NOTIFICATION, self._job, 'notify 1'),
+            pool.submit(PRIORITY_SHRINK, self._job, 'shrink 2'),
+            pool.submit(PRIORITY_NOTIFICATION, self._job, 'notify 2'),
+        ]
+        pool.start()
+        await asyncio.gather(*futures)
+        await pool.stop()
+        self.assertEqual(self.ran, ['notify 1', 'notify 2', 'shrink 1', 'shrink 2', 'error'])
+        self.assertEqual(pool.stats['completed'], 5)
+
+    async def test_submit_rejects_when_full(self):
+        pool = WorkPool(workers=1, max_queue=2)
+        pool.submit(PRIORITY_SHRINK, self._job, 'a')
+        pool.submit(PRIORITY_SHRINK, self._job, 'b')
+        with self.assertRaises(asyncio.QueueFull):
+            pool.submit(PRIORITY_NOTIFICATION, self._job, 'c')
+        self.assertEqual(pool.stats['rejected'], 1)
+        self.assertEqual(pool.depth(), 2)
+
+        pool.start()
+        await pool.stop()
+        self.assertEqual(self.ran, ['a', 'b'])
+
+    async def test_failed_job_reported_through_future(self):
+        async def fail():
+            raise ValueError("boom")
+
+        pool = WorkPool(workers=1)
+        pool.start()
+        # Not assertRaises: clearing the traceback's frames would finalize the worker
+        results = await asyncio.gather(pool.submit(PRIORITY_NOTIFICATION, fail), return_exceptions=True)
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(await pool.run(PRIORITY_NOTIFICATION, self._job, 'after'), 'after')
+        await pool.stop()
+        self.assertEqual(pool.stats['failed'], 1)
+
+    async def test_stop_cancels_jobs_left_queued(self):
+        release = asyncio.Event()
+
+        async def block():
+            await release.wait()
+
+        pool = WorkPool(workers=1)
+        pool.start()
+        pool.submit(PRIORITY_NOTIFICATION, block)
+        queued = pool.submit(PRIORITY_NOTIFICATION, self._job, 'late')
+        await pool.stop(timeout=0.05)
+        self.assertTrue(queued.cancelled())
+        self.assertEqual(self.ran, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
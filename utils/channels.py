@@ -0,0 +1,56 @@
+import time
+
+import discord
+
+
+class ChannelResolver:
+    """Resolves channel IDs with caching of both hits and failures.
+
+    Channels not in discord.py's cache are fetched once and kept. NotFound
+    and Forbidden results are remembered for `negative_ttl` seconds, so a
+    deleted or inaccessible channel doesn't cost a REST call per event.
+    """
+
+    def __init__(self, bot, negative_ttl=300):
+        self.bot = bot
+        self.negative_ttl = negative_ttl
+        # channel_id -> channel fetched over REST
+        self._channels = {}
+        # channel_id -> (exception, expires_at)
+        self._failures = {}
+        self.stats = {'hits': 0, 'fetches': 0, 'negative_hits': 0}
+
+    async def resolve(self, channel_id: int):
+        """Return the channel with this ID.
+
+        Raises:
+            discord.NotFound: The channel doesn't exist (possibly cached).
+            discord.Forbidden: The bot can't access the channel (possibly cached).
+        """
+        failure = self._failures.get(channel_id)
+        if failure is not None:
+            error, expires_at = failure
+            if time.monotonic() < expires_at:
+                self.stats['negative_hits'] += 1
+                raise error.with_traceback(None)
+            del self._failures[channel_id]
+
+        channel = self.bot.get_channel(channel_id) or self._channels.get(channel_id)
+        if channel is not None:
+            self.stats['hits'] += 1
+            return channel
+
+        self.stats['fetches'] += 1
+        try:
+            channel = await self.bot.fetch_channel(channel_id)
+        except (discord.NotFound, discord.Forbidden) as e:
+            self._failures[channel_id] = (e, time.monotonic() + self.negative_ttl)
+            raise
+
+        self._channels[channel_id] = channel
+        return channel
+
+    def invalidate(self, channel_id: int):
+        """Forget anything cached for a channel."""
+        self._channels.pop(channel_id, None)
+        self._failures.pop(channel_id, None)
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import time
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Discord limits per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_EMBED_CHARS_PER_MESSAGE = 6000
+MAX_VIEW_ITEMS = 25
+
+
+class _PendingNotification:
+    """One queued embed waiting to be packed into a message."""
+
+    __slots__ = ('embed', 'view', 'key', 'future', 'queued_at')
+
+    def __init__(self, embed, view, key, future):
+        self.embed = embed
+        self.view = view
+        self.key = key
+        self.future = future
+        self.queued_at = time.monotonic()
+
+
+class _ChannelBuffer:
+    """Notifications queued for one destination channel and sender identity."""
+
+    __slots__ = ('channel', 'identity', 'items', 'full', 'task')
+
+    def __init__(self, channel, identity):
+        self.channel = channel
+        self.identity = identity
+        self.items = []
+        self.full = asyncio.Event()
+        self.task = None
+
+
+class DispatchQueue:
+    """Batches notifications per channel and sends each batch as one message.
+
+    Notifications for the same channel that arrive within `flush_interval`
+    of each other are packed into a single message of up to `max_batch`
+    embeds. Each channel has at most one send in flight, so while Discord
+    rate-limits a channel new notifications pile up into the next batch
+    instead of becoming separate, late messages.
+
+    Notifications with different identities (e.g. webhook usernames) are
+    batched separately, since a message has only one author.
+    """
+
+    def __init__(self, flush_interval=0.5, max_batch=MAX_EMBEDS_PER_MESSAGE, on_sent=None, sender=None):
+        """
+        Args:
+            flush_interval: Seconds to wait for more notifications before sending.
+            max_batch: Max embeds per message (capped at Discord's limit of 10).
+            on_sent: Optional callback called with (message, keys) after each
+                batch is sent, where keys are the keys of the packed notifications.
+            sender: Optional coroutine function called with (channel, embeds,
+                view, identity) to send a batch and return the message.
+                Defaults to channel.send.
+        """
+        self.flush_interval = flush_interval
+        self.max_batch = max(1, min(max_batch, MAX_EMBEDS_PER_MESSAGE))
+        self.on_sent = on_sent
+        self.sender = sender
+        self._buffers = {}
+        self.stats = {
+            'notifications': 0,
+            'messages': 0,
+            'messages_saved': 0,
+            'failed': 0,
+            'latency_total': 0.0,
+            'latency_max': 0.0,
+        }
+
+    def depth(self):
+        """Return the number of notifications waiting to be sent."""
+        return sum(len(buffer.items) for buffer in self._buffers.values())
+
+    def average_latency(self):
+        """Return the mean seconds between queueing and sending a notification."""
+        sent = self.stats['notifications']
+        return self.stats['latency_total'] / sent if sent else 0.0
+
+    async def send(self, channel, embed, view=None, key=None, identity=None):
+        """Queue an embed for a channel and wait until it has been sent.
+
+        Args:
+            channel: Destination messageable channel.
+            embed: The notification embed.
+            view: Optional view; its (link button) items are merged into the
+                batch message's view.
+            key: Identifier passed back to on_sent, e.g. the thread ID.
+            identity: Optional hashable passed to the sender, e.g. a webhook
+                (username, avatar_url).
+
+        Returns:
+            The message the embed was sent in, shared with the rest of its batch.
+        """
+        buffer_key = (channel.id, identity)
+        buffer = self._buffers.get(buffer_key)
+        if buffer is None:
+            buffer = self._buffers[buffer_key] = _ChannelBuffer(channel, identity)
+        buffer.channel = channel
+
+        future = asyncio.get_running_loop().create_future()
+        buffer.items.append(_PendingNotification(embed, view, key, future))
+        if len(buffer.items) >= self.max_batch:
+            buffer.full.set()
+        if buffer.task is None or buffer.task.done():
+            buffer.task = asyncio.create_task(self._drain(buffer_key, buffer))
+
+        return await future
+
+    async def flush(self):
+        """Send everything queued now and wait for it to go out."""
+        tasks = []
+        for buffer in self._buffers.values():
+            buffer.full.set()
+            if buffer.task is not None:
+                tasks.append(buffer.task)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _drain(self, buffer_key, buffer):
+        """Send batches for a channel until its buffer is empty."""
+        try:
+            while buffer.items:
+                wait = buffer.items[0].queued_at + self.flush_interval - time.monotonic()
+                if wait > 0 and len(buffer.items) < self.max_batch:
+                    buffer.full.clear()
+                    try:
+                        await asyncio.wait_for(buffer.full.wait(), timeout=wait)
+                    except asyncio.TimeoutError:
+                        pass
+
+                batch = self._take_batch(buffer)
+                await self._send_batch(buffer.channel, batch, buffer.identity)
+        finally:
+            if self._buffers.get(buffer_key) is buffer and not buffer.items:
+                del self._buffers[buffer_key]
+
+    def _take_batch(self, buffer):
+        """Remove and return the next batch that fits in one message."""
+        batch = []
+        chars = 0
+        for item in buffer.items:
+            size = len(item.embed)
+            if batch and (len(batch) >= self.max_batch or chars + size > MAX_EMBED_CHARS_PER_MESSAGE):
+                break
+            batch.append(item)
+            chars += size
+        del buffer.items[:len(batch)]
+        return batch
+
+    async def _send_batch(self, channel, batch, identity=None):
+        """Send a batch as one message and resolve its futures."""
+        view = self._merge_views(batch)
+        embeds = [item.embed for item in batch]
+        try:
+            if self.sender is not None:
+                message = await self.sender(channel, embeds, view, identity)
+            else:
+                message = await channel.send(embeds=embeds, view=view)
+        except Exception as e:
+            self.stats['failed'] += len(batch)
+            for item in batch:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        now = time.monotonic()
+        self.stats['messages'] += 1
+        self.stats['notifications'] += len(batch)
+        self.stats['messages_saved'] += len(batch) - 1
+        for item in batch:
+            latency = now - item.queued_at
+            self.stats['latency_total'] += latency
+            self.stats['latency_max'] = max(self.stats['latency_max'], latency)
+            if not item.future.done():
+                item.future.set_result(message)
+
+        if self.on_sent is not None:
+            try:
+                self.on_sent(message, [item.key for item in batch])
+            except Exception:
+                log.exception("Error in dispatch callback")
+
+    def _merge_views(self, batch):
+        """Combine the batch's link buttons into one view, dropping duplicates."""
+        if len(batch) == 1:
+            return batch[0].view or discord.utils.MISSING
+        view = merge_views(item.view for item in batch)
+        return view if view is not None else discord.utils.MISSING
+
+
+def merge_views(views):
+    """Combine the link buttons of several views into one, dropping duplicates.
+
+    Returns None if there are no buttons.
+    """
+    merged = discord.ui.View()
+    seen = set()
+    for view in views:
+        if view is None:
+            continue
+        for child in view.children:
+            url = getattr(child, 'url', None)
+            if url in seen or len(merged.children) >= MAX_VIEW_ITEMS:
+                continue
+            seen.add(url)
+            merged.add_item(child)
+    return merged if merged.children else None
@@ -0,0 +1,96 @@
+import re
+import time
+from collections import OrderedDict
+
+# Long digit runs are IDs; masking them groups errors that differ only by ID
+_ID_PATTERN = re.compile(r'\d{5,}')
+
+
+def fingerprint(message: str) -> str:
+    """Return a key that is the same for repeats of the same kind of error."""
+    return _ID_PATTERN.sub('#', message)
+
+
+class _ErrorRecord:
+    """Occurrences of one error fingerprint for one destination."""
+
+    __slots__ = ('message', 'first_seen', 'last_seen', 'reported_at', 'suppressed')
+
+    def __init__(self, message, now):
+        self.message = message
+        self.first_seen = now
+        self.last_seen = now
+        self.reported_at = now
+        self.suppressed = 0
+
+
+class ErrorAggregator:
+    """De-duplicates error reports per destination channel.
+
+    The first occurrence of an error is reported straight away. Repeats
+    within `window` seconds are only counted, and drain() returns them as
+    summaries to post periodically. At most `max_entries` fingerprints are
+    tracked; the least recently seen are dropped first.
+    """
+
+    def __init__(self, window=300, max_entries=256):
+        self.window = window
+        self.max_entries = max_entries
+        # (channel_id, fingerprint) -> _ErrorRecord, least recently seen first
+        self._records = OrderedDict()
+        self.stats = {'reported': 0, 'suppressed': 0, 'evicted': 0}
+
+    def report(self, channel_id, message: str) -> bool:
+        """Count an error. Returns True if it should be reported now."""
+        now = time.time()
+        key = (channel_id, fingerprint(message))
+        record = self._records.get(key)
+
+        if record is not None and now - record.reported_at < self.window:
+            if record.first_seen is None:
+                record.first_seen = now
+            record.last_seen = now
+            record.message = message
+            record.suppressed += 1
+            self._records.move_to_end(key)
+            self.stats['suppressed'] += 1
+            return False
+
+        if record is not None and record.suppressed:
+            # Window over; report again and keep counting repeats for the summary
+            record.reported_at = now
+            record.last_seen = now
+            record.message = message
+            self._records.move_to_end(key)
+            self.stats['reported'] += 1
+            return True
+
+        self._records[key] = _ErrorRecord(message, now)
+        self._records.move_to_end(key)
+        while len(self._records) > self.max_entries:
+            self._records.popitem(last=False)
+            self.stats['evicted'] += 1
+        self.stats['reported'] += 1
+        return True
+
+    def drain(self) -> dict:
+        """Return and reset suppressed repeats, grouped by channel.
+
+        Returns:
+            dict: channel_id -> list of (message, count, first_seen, last_seen)
+        """
+        now = time.time()
+        summaries = {}
+        for key, record in list(self._records.items()):
+            channel_id = key[0]
+            if record.suppressed:
+                summaries.setdefault(channel_id, []).append(
+                    (record.message, record.suppressed, record.first_seen, record.last_seen)
+                )
+                record.suppressed = 0
+                # Next summary starts from the next repeat
+                record.first_seen = None
+            elif now - record.last_seen >= self.window:
+                # Quiet for a whole window, forget it
+                del self._records[key]
+        return summaries
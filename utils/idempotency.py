@@ -0,0 +1,83 @@
+import time
+from collections import OrderedDict
+
+from utils.storage import delete_record, load_records, put_record
+
+
+class NotifiedThreads:
+    """Bounded, persisted set of thread IDs that were already announced.
+
+    Entries are kept oldest first in memory, so lookups are O(1) and expiry
+    and eviction only ever look at the front. Every change is persisted as a
+    record (written in the background), so duplicates are still caught after
+    a restart. Entries expire after `ttl` seconds; once more than
+    `max_entries` are tracked the oldest are dropped.
+    """
+
+    RECORD_KIND = "notified_threads"
+
+    def __init__(self, max_entries=10000, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # thread_id -> time added, oldest first
+        self._entries = OrderedDict()
+        self.stats = {'added': 0, 'duplicates': 0, 'expired': 0, 'evicted': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, thread_id):
+        added_at = self._entries.get(thread_id)
+        return added_at is not None and time.time() - added_at < self.ttl
+
+    def load(self, owns=None):
+        """Load persisted entries, dropping expired ones.
+
+        Args:
+            owns: Optional predicate called with a guild ID (None for entries
+                saved without one); entries it rejects are left to the process
+                that handles their guild.
+        """
+        entries = []
+        for key, value in load_records(self.RECORD_KIND).items():
+            # Stored as [added_at, guild_id]; older records are just added_at
+            added_at, guild_id = value if isinstance(value, list) else (value, None)
+            if owns is None or owns(guild_id):
+                entries.append((added_at, int(key)))
+        for added_at, thread_id in sorted(entries):
+            self._entries[thread_id] = added_at
+        self._trim()
+
+    def add(self, thread_id: int, guild_id: int = None) -> bool:
+        """Mark a thread as announced. Returns False if it already was."""
+        if thread_id in self:
+            self.stats['duplicates'] += 1
+            return False
+
+        now = time.time()
+        # A stale entry for the same thread is replaced by a fresh one at the end
+        self._entries.pop(thread_id, None)
+        self._entries[thread_id] = now
+        put_record(self.RECORD_KIND, thread_id, [now, guild_id])
+        self.stats['added'] += 1
+        self._trim()
+        return True
+
+    def discard(self, thread_id: int):
+        """Forget a thread, e.g. after its notification failed so a retry is allowed."""
+        if self._entries.pop(thread_id, None) is not None:
+            delete_record(self.RECORD_KIND, thread_id)
+
+    def _trim(self):
+        """Drop expired entries and evict the oldest beyond max_entries."""
+        cutoff = time.time() - self.ttl
+        while self._entries:
+            thread_id, added_at = next(iter(self._entries.items()))
+            if added_at < cutoff:
+                self.stats['expired'] += 1
+            elif len(self._entries) > self.max_entries:
+                self.stats['evicted'] += 1
+            else:
+                break
+            del self._entries[thread_id]
+            delete_record(self.RECORD_KIND, thread_id)
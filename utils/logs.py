@@ -0,0 +1,122 @@
+import atexit
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _extra_fields(record) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JSONFormatter(logging.Formatter):
+    """Formats records as one JSON object per line, including extra fields."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formats records as readable lines with extra fields as key=value pairs."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)-7s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = _extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps only a fraction of records of high-volume event types.
+
+    Records are matched on their `event` extra field. Warnings and errors
+    are always kept.
+    """
+
+    def __init__(self, rates: dict):
+        """
+        Args:
+            rates: event -> fraction of records to keep, e.g. {'thread_notified': 0.1}.
+        """
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, 'event', None))
+        return rate is None or random.random() < rate
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the logging thread, keeping extra fields and tracebacks separate."""
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg = record.message
+        record.args = None
+        record.exc_info = None
+        return record
+
+
+def parse_sample_rates(text: str) -> dict:
+    """Parse "event=rate,event=rate" into a dict."""
+    rates = {}
+    for part in text.split(','):
+        if '=' in part:
+            event, rate = part.split('=', 1)
+            rates[event.strip()] = float(rate)
+    return rates
+
+
+def setup_logging(level='INFO', fmt='json', sample_rates=None):
+    """Send all logging through a queue to a background thread that writes to stdout.
+
+    Logging calls on the event loop only enqueue the record, so bursts
+    never block on stdout or journald.
+
+    Args:
+        level: Root log level name.
+        fmt: 'json' for JSON lines, 'text' for readable lines.
+        sample_rates: Optional event -> fraction of info/debug records kept.
+
+    Returns:
+        The started QueueListener; stop() it to flush on shutdown.
+    """
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(JSONFormatter() if fmt == 'json' else TextFormatter())
+
+    records = queue.SimpleQueue()
+    handler = _QueueHandler(records)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(level.upper())
+
+    listener = logging.handlers.QueueListener(records, output, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class OwnerResolver:
+    """Resolves thread owners when the member cache is disabled.
+
+    Without the members intent discord.py doesn't cache guild members, so
+    `thread.owner` is None. Owners are then fetched on demand and kept in a
+    small LRU cache for `ttl` seconds, so regular posters cost one REST call
+    per window. Concurrent lookups of the same member share one request.
+    Members that left the guild are cached as None.
+    """
+
+    def __init__(self, bot, fetch=True, max_entries=1000, ttl=600):
+        """
+        Args:
+            bot: The bot.
+            fetch: Fetch owners missing from discord.py's cache. Off when the
+                member cache is complete, where a missing owner has left.
+            max_entries: Max members kept.
+            ttl: Seconds a fetched member is used before fetching it again.
+        """
+        self.bot = bot
+        self.fetch = fetch
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # (guild_id, user_id) -> (member or None, expires_at), least recently used first
+        self._members = OrderedDict()
+        # (guild_id, user_id) -> task fetching that member
+        self._pending = {}
+        self.stats = {'hits': 0, 'fetches': 0, 'failed': 0}
+
+    def __len__(self):
+        return len(self._members)
+
+    def get(self, thread):
+        """Return the thread's owner if known without a request, else None."""
+        if thread.owner is not None or thread.owner_id is None:
+            return thread.owner
+
+        key = (thread.guild.id, thread.owner_id)
+        entry = self._members.get(key)
+        if entry is None:
+            return None
+        member, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._members[key]
+            return None
+        self._members.move_to_end(key)
+        return member
+
+    async def resolve(self, thread):
+        """Return the thread's owner, fetching it if needed. None if unavailable."""
+        owner = self.get(thread)
+        if thread.owner is not None or not self.fetch or thread.owner_id is None:
+            return owner
+
+        key = (thread.guild.id, thread.owner_id)
+        # Includes members cached as having left the guild (None)
+        if key in self._members:
+            self.stats['hits'] += 1
+            return owner
+
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.create_task(self._fetch(thread.guild, thread.owner_id))
+            task.add_done_callback(lambda _: self._pending.pop(key, None))
+        else:
+            self.stats['hits'] += 1
+        return await asyncio.shield(task)
+
+    async def _fetch(self, guild, user_id: int):
+        """Fetch a member and cache the result."""
+        self.stats['fetches'] += 1
+        try:
+            member = await guild.fetch_member(user_id)
+        except discord.NotFound:
+            member = None
+        except Exception as e:
+            # Not cached, so the next post tries again
+            self.stats['failed'] += 1
+            log.warning("Error fetching member: %s", e, extra={'guild_id': guild.id, 'user_id': user_id})
+            return None
+
+        self._members[(guild.id, user_id)] = (member, time.monotonic() + self.ttl)
+        while len(self._members) > self.max_entries:
+            self._members.popitem(last=False)
+        return member
@@ -0,0 +1,160 @@
+import bisect
+import logging
+import time
+from contextlib import contextmanager
+
+from aiohttp import web
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    """Escape a label value for the text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    """Render label pairs as {a="1",b="2"}, or nothing if empty."""
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+class Counter:
+    """A monotonically increasing value per label set."""
+
+    type = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        for labels, value in self._values.items():
+            yield self.name, labels, value
+
+
+class Histogram:
+    """Observations bucketed by upper bound, per label set."""
+
+    type = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., sum, count]
+        self._values = {}
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        data = self._values.get(key)
+        if data is None:
+            data = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            data[index] += 1
+        data[-2] += value
+        data[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        for labels, data in self._values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, data):
+                cumulative += count
+                yield f"{self.name}_bucket", labels + (('le', repr(bound)),), cumulative
+            yield f"{self.name}_bucket", labels + (('le', '+Inf'),), data[-1]
+            yield f"{self.name}_sum", labels, data[-2]
+            yield f"{self.name}_count", labels, data[-1]
+
+
+class Callback:
+    """A metric read from a function at scrape time.
+
+    The function returns a number, or a dict of {label_value: number} which
+    is exported with `label` as the label name.
+    """
+
+    def __init__(self, name, help_text, metric_type, function, label=None):
+        self.name = name
+        self.help = help_text
+        self.type = metric_type
+        self.function = function
+        self.label = label
+
+    def samples(self):
+        value = self.function()
+        if isinstance(value, dict):
+            for label_value, item in value.items():
+                yield self.name, ((self.label, label_value),), item
+        elif value is not None:
+            yield self.name, (), value
+
+
+class Registry:
+    """Holds metrics by name and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def counter(self, name, help_text):
+        """Return the counter with this name, creating it if needed."""
+        return self._metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        """Return the histogram with this name, creating it if needed."""
+        return self._metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    def callback(self, name, help_text, function, metric_type="gauge", label=None):
+        """Export the result of `function` at scrape time, replacing any previous one."""
+        self._metrics[name] = Callback(name, help_text, metric_type, function, label)
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                samples = list(metric.samples())
+            except Exception:
+                log.exception("Error collecting metric %s", metric.name)
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for name, labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+async def start_metrics_server(host, port, registry=REGISTRY):
+    """Serve registry at http://host:port/metrics. Returns the runner to clean up."""
+    async def handle_metrics(request):
+        return web.Response(
+            body=registry.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
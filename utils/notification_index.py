@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from utils.storage import delete_record, load_records, put_record
+
+
+class NotificationMessage:
+    """A sent notification message and the threads whose embeds it holds."""
+
+    __slots__ = ('message_id', 'channel_id', 'guild_id', 'thread_ids', 'via_webhook', 'shrunk', 'sent_at', 'lock')
+
+    def __init__(self, message_id, channel_id, guild_id, thread_ids, via_webhook=False, shrunk=False, sent_at=None):
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        # In embed order
+        self.thread_ids = list(thread_ids)
+        self.via_webhook = via_webhook
+        # True once its embeds were replaced with compact ones
+        self.shrunk = shrunk
+        self.sent_at = sent_at if sent_at is not None else time.time()
+        # Held while the message is edited, so a shrink and a live update don't interleave
+        self.lock = asyncio.Lock()
+
+    def to_record(self):
+        return [self.channel_id, self.guild_id, self.thread_ids, self.via_webhook, self.shrunk, self.sent_at]
+
+
+class NotificationIndex:
+    """Bounded, persisted index from threads to the notification messages announcing them.
+
+    Used to edit or remove notifications when their thread is renamed,
+    retagged or deleted. Messages are kept oldest first; they expire after
+    `ttl` seconds and the oldest are dropped beyond `max_entries`.
+    """
+
+    RECORD_KIND = "notification_messages"
+
+    def __init__(self, max_entries=10000, ttl=7 * 24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # message_id -> NotificationMessage, oldest first
+        self._messages = OrderedDict()
+        # thread_id -> message IDs of its notifications (one per destination)
+        self._by_thread = {}
+
+    def __len__(self):
+        return len(self._messages)
+
+    def load(self, owns=None):
+        """Load persisted messages, dropping expired ones.
+
+        Args:
+            owns: Optional predicate called with a guild ID; messages it
+                rejects are left to the process that handles their guild.
+        """
+        entries = []
+        for key, value in load_records(self.RECORD_KIND).items():
+            entry = NotificationMessage(int(key), *value)
+            if owns is None or owns(entry.guild_id):
+                entries.append(entry)
+        for entry in sorted(entries, key=lambda entry: entry.sent_at):
+            self._insert(entry)
+        self._trim()
+
+    def get(self, message_id: int):
+        """Return the indexed message with this ID, or None."""
+        return self._messages.get(message_id)
+
+    def messages_for(self, thread_id: int) -> list:
+        """Return the notification messages announcing a thread."""
+        return [self._messages[message_id] for message_id in self._by_thread.get(thread_id, ())]
+
+    def add(self, message_id: int, channel_id: int, guild_id: int, thread_ids, via_webhook: bool = False):
+        """Index a sent notification message."""
+        entry = NotificationMessage(message_id, channel_id, guild_id, thread_ids, via_webhook)
+        self._insert(entry)
+        put_record(self.RECORD_KIND, message_id, entry.to_record())
+        self._trim()
+
+    def mark_shrunk(self, message_id: int):
+        """Record that a message now shows compact embeds."""
+        entry = self._messages.get(message_id)
+        if entry is not None and not entry.shrunk:
+            entry.shrunk = True
+            put_record(self.RECORD_KIND, message_id, entry.to_record())
+
+    def remove_thread(self, message_id: int, thread_id: int):
+        """Drop a (deleted) thread from a message's embeds."""
+        entry = self._messages.get(message_id)
+        if entry is None or thread_id not in entry.thread_ids:
+            return
+        entry.thread_ids.remove(thread_id)
+        self._unlink(thread_id, message_id)
+        put_record(self.RECORD_KIND, message_id, entry.to_record())
+
+    def discard(self, message_id: int):
+        """Forget a message, e.g. after it was deleted."""
+        entry = self._messages.pop(message_id, None)
+        if entry is None:
+            return
+        for thread_id in entry.thread_ids:
+            self._unlink(thread_id, message_id)
+        delete_record(self.RECORD_KIND, message_id)
+
+    def _insert(self, entry):
+        self._messages[entry.message_id] = entry
+        for thread_id in entry.thread_ids:
+            self._by_thread.setdefault(thread_id, []).append(entry.message_id)
+
+    def _unlink(self, thread_id: int, message_id: int):
+        message_ids = self._by_thread.get(thread_id)
+        if message_ids and message_id in message_ids:
+            message_ids.remove(message_id)
+            if not message_ids:
+                del self._by_thread[thread_id]
+
+    def _trim(self):
+        """Drop expired messages and evict the oldest beyond max_entries."""
+        cutoff = time.time() - self.ttl
+        while self._messages:
+            entry = next(iter(self._messages.values()))
+            if entry.sent_at >= cutoff and len(self._messages) <= self.max_entries:
+                break
+            self.discard(entry.message_id)
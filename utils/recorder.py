@@ -0,0 +1,75 @@
+import json
+import time
+from pathlib import Path
+
+# Gateway events written to a capture
+RECORDED_EVENTS = frozenset({'THREAD_CREATE', 'MESSAGE_CREATE', 'CHANNEL_UPDATE'})
+
+# Seconds between flushes of the capture file
+FLUSH_INTERVAL = 1.0
+
+
+class EventRecorder:
+    """Appends raw gateway payloads to a capture file for offline replay.
+
+    Each line is a compact JSON array of [seconds since recording started,
+    event type, payload]. Only forum-relevant events are kept, and of
+    MESSAGE_CREATE only thread starter messages (message ID == channel ID),
+    which keeps captures small on busy servers.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self.recorded = 0
+
+    def record(self, raw):
+        """Record a raw gateway message (str or bytes) if it is a recorded event."""
+        if isinstance(raw, bytes):
+            raw = raw.decode('utf-8')
+        # Cheap check before parsing; most traffic is presence and typing
+        if not any(event in raw for event in RECORDED_EVENTS):
+            return
+
+        message = json.loads(raw)
+        event = message.get('t')
+        if event not in RECORDED_EVENTS:
+            return
+        data = message.get('d') or {}
+        if event == 'MESSAGE_CREATE' and data.get('id') != data.get('channel_id'):
+            return
+
+        now = time.monotonic()
+        self._file.write(json.dumps([round(now - self._started, 3), event, data], separators=(',', ':')))
+        self._file.write('\n')
+        self.recorded += 1
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._file.flush()
+            self._last_flush = now
+
+    def close(self):
+        """Flush and close the capture file."""
+        self._file.close()
+
+
+def read_capture(path):
+    """Yield (offset, event, payload) from a capture file, skipping damaged lines.
+
+    Offsets never go backwards; a later recording session appended to the
+    same file continues where the previous one ended.
+    """
+    base = last = 0.0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                offset, event, data = json.loads(line)
+            except ValueError:
+                # Partially written last line after a crash
+                continue
+            if offset + base < last:
+                base = last
+            last = offset + base
+            yield last, event, data
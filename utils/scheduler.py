@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import namedtuple
+
+from utils.storage import delete_record, load_records, put_record
+
+log = logging.getLogger(__name__)
+
+# A pending notification shrink. Only IDs are kept so thousands of pending
+# jobs stay cheap; the handler resolves messages and threads when it runs.
+# thread_ids lists every thread whose embed is in the message, in order.
+# via_webhook is True for messages sent through a channel webhook, which
+# have to be edited through it too. guild_id decides which process runs
+# the job when shards are split across processes.
+ShrinkJob = namedtuple(
+    'ShrinkJob', 'due_at channel_id message_id thread_ids via_webhook guild_id', defaults=(False, None)
+)
+
+
+class ShrinkScheduler:
+    """Runs notification shrinks at their due time from a single timer task.
+
+    Jobs sit in a heap ordered by due time and are persisted as records, so
+    shrinks still pending when the bot stops are resumed on the next start
+    (overdue ones run straight away). Due jobs are handed to a fixed number
+    of workers through a bounded queue.
+    """
+
+    RECORD_KIND = "shrink_jobs"
+
+    def __init__(self, handler, workers=2):
+        """
+        Args:
+            handler: Coroutine function called with each due ShrinkJob.
+            workers: Number of shrinks that may run at the same time.
+        """
+        self.handler = handler
+        self.worker_count = workers
+        self._heap = []
+        self._queue = asyncio.Queue(maxsize=workers * 2)
+        self._wakeup = asyncio.Event()
+        self._tasks = []
+
+    def __len__(self):
+        return len(self._heap)
+
+    def load(self, owns=None):
+        """Load persisted jobs into the heap.
+
+        Args:
+            owns: Optional predicate called with a job's guild ID (None for
+                jobs saved without one); jobs it rejects are left to the
+                process that handles their guild.
+        """
+        for key, (due_at, channel_id, thread_ids, *rest) in load_records(self.RECORD_KIND).items():
+            if isinstance(thread_ids, int):
+                # Saved before notifications were batched
+                thread_ids = [thread_ids]
+            # via_webhook and guild_id are missing from jobs saved before webhook delivery and sharding
+            via_webhook = bool(rest and rest[0])
+            guild_id = rest[1] if len(rest) > 1 else None
+            if owns is not None and not owns(guild_id):
+                continue
+            self._heap.append(ShrinkJob(due_at, channel_id, int(key), tuple(thread_ids), via_webhook, guild_id))
+        heapq.heapify(self._heap)
+
+    def start(self):
+        """Start the timer task and workers."""
+        if self._tasks:
+            return
+        self._tasks.append(asyncio.create_task(self._run()))
+        for _ in range(self.worker_count):
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    async def stop(self):
+        """Stop the timer task and workers. Pending jobs stay persisted."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Jobs taken off the heap but not yet run go back so they aren't lost
+        while not self._queue.empty():
+            heapq.heappush(self._heap, self._queue.get_nowait())
+
+    def schedule(self, channel_id: int, message_id: int, thread_ids, delay: float, via_webhook: bool = False,
+                 guild_id: int = None):
+        """Shrink a notification message after `delay` seconds."""
+        job = ShrinkJob(time.time() + delay, channel_id, message_id, tuple(thread_ids), via_webhook, guild_id)
+        heapq.heappush(self._heap, job)
+        put_record(self.RECORD_KIND, message_id, [job.due_at, channel_id, list(job.thread_ids), via_webhook, guild_id])
+
+        # Wake the timer if this job is now the earliest
+        if self._heap[0] is job:
+            self._wakeup.set()
+
+    async def _run(self):
+        """Sleep until the earliest job is due, then hand due jobs to the workers."""
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0].due_at - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = heapq.heappop(self._heap)
+            try:
+                # Blocks while all workers are busy and the queue is full
+                await self._queue.put(job)
+            except asyncio.CancelledError:
+                heapq.heappush(self._heap, job)
+                raise
+
+    async def _work(self):
+        """Run due jobs one at a time."""
+        while True:
+            job = await self._queue.get()
+            try:
+                await self.handler(job)
+            except asyncio.CancelledError:
+                # Stopped mid-run; keep the job so it runs again after a restart
+                heapq.heappush(self._heap, job)
+                raise
+            except Exception:
+                log.exception("Error running shrink", extra={'message_id': job.message_id})
+            delete_record(self.RECORD_KIND, job.message_id)
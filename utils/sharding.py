@@ -0,0 +1,42 @@
+def parse_shard_ids(text):
+    """Parse "0-3" or "0,2,5" (or a mix, e.g. "0-1,4") into a sorted list of shard IDs."""
+    shard_ids = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            start, end = part.split('-', 1)
+            shard_ids.update(range(int(start), int(end) + 1))
+        else:
+            shard_ids.add(int(part))
+    return sorted(shard_ids)
+
+
+def shard_for(guild_id: int, shard_count: int) -> int:
+    """Return the shard Discord delivers a guild's events on."""
+    return (guild_id >> 22) % shard_count
+
+
+class GuildPartition:
+    """The guilds handled by this process when shards are split across processes.
+
+    Background work loaded from the shared store (scheduled shrinks, digests,
+    catch-up marks...) is filtered with this, so every guild's work is done
+    by exactly one process. Without a shard range every guild is owned.
+    """
+
+    def __init__(self, shard_ids=None, shard_count=None):
+        self.shard_count = shard_count
+        self.shard_ids = frozenset(shard_ids) if shard_ids is not None else None
+
+    def owns(self, guild_id) -> bool:
+        """Return True if this process handles the guild.
+
+        guild_id None (state saved before sharding support) belongs to the
+        process running shard 0.
+        """
+        if self.shard_ids is None or not self.shard_count:
+            return True
+        shard_id = 0 if guild_id is None else shard_for(int(guild_id), self.shard_count)
+        return shard_id in self.shard_ids
@@ -0,0 +1,370 @@
+import copy
+import json
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+
+from utils.storage import DEFAULT_GUILD_SETTINGS, DEFAULT_SETTINGS, normalize_settings
+
+log = logging.getLogger(__name__)
+
+# Scalar settings stored as columns of guild_config
+CONFIG_COLUMNS = (
+    'notification_channel_id', 'error_channel_id', 'embed_color', 'preview_length', 'shrink_delay'
+)
+
+# Schema migrations, applied in order. A database's PRAGMA user_version is
+# the number of migrations already applied to it. Never edit a released
+# migration; append a new one instead.
+MIGRATIONS = [
+    # 1: guild config, monitored forums and sent notifications
+    [
+        """
+        CREATE TABLE guild_config (
+            guild_id INTEGER PRIMARY KEY,
+            notification_channel_id INTEGER,
+            error_channel_id INTEGER,
+            embed_color TEXT NOT NULL DEFAULT '#2f3136',
+            preview_length INTEGER NOT NULL DEFAULT 100
+        )
+        """,
+        """
+        CREATE TABLE monitored_forums (
+            forum_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL REFERENCES guild_config(guild_id) ON DELETE CASCADE
+        )
+        """,
+        "CREATE INDEX idx_monitored_forums_guild ON monitored_forums(guild_id)",
+        """
+        CREATE TABLE sent_notifications (
+            thread_id INTEGER PRIMARY KEY,
+            guild_id INTEGER NOT NULL,
+            forum_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            sent_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX idx_sent_notifications_forum ON sent_notifications(forum_id, sent_at)",
+        "CREATE INDEX idx_sent_notifications_sent_at ON sent_notifications(sent_at)",
+    ],
+    # 2: configurable shrink delay, generic keyed records (scheduled shrinks etc.)
+    [
+        "ALTER TABLE guild_config ADD COLUMN shrink_delay INTEGER NOT NULL DEFAULT 300",
+        """
+        CREATE TABLE records (
+            kind TEXT NOT NULL,
+            key TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (kind, key)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # 3: per-forum digest mode
+    [
+        "ALTER TABLE monitored_forums ADD COLUMN digest_minutes INTEGER NOT NULL DEFAULT 0",
+    ],
+    # 4: notification routing rules
+    [
+        """
+        CREATE TABLE notification_routes (
+            guild_id INTEGER NOT NULL REFERENCES guild_config(guild_id) ON DELETE CASCADE,
+            position INTEGER NOT NULL,
+            forum_id INTEGER NOT NULL,
+            tag_id INTEGER,
+            role_id INTEGER,
+            channel_id INTEGER NOT NULL,
+            PRIMARY KEY (guild_id, position)
+        )
+        """,
+    ],
+    # 5: per-forum webhook username and avatar
+    [
+        "ALTER TABLE monitored_forums ADD COLUMN webhook_username TEXT",
+        "ALTER TABLE monitored_forums ADD COLUMN webhook_avatar_url TEXT",
+    ],
+    # 6: drop the notification history; it was never read or pruned, and the
+    # notification index (a record kind) tracks sent messages instead
+    [
+        "DROP TABLE sent_notifications",
+    ],
+]
+
+# Fields of a routing rule, stored as columns of notification_routes
+ROUTE_COLUMNS = ('forum_id', 'tag_id', 'role_id', 'channel_id')
+
+
+class SQLiteStorage:
+    """Stores settings and records in a SQLite database (WAL mode).
+
+    Settings are still handed out as a dict, but save() only touches the rows
+    that changed since the last load or save.
+
+    Writes run on the writer thread and may wait for other processes sharing
+    the database. Reads from the event loop use a second connection, which
+    in WAL mode never waits for writers, so the loop is never blocked by them.
+    """
+
+    def __init__(self, path, import_from=None):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Guards the write connection, used by the writer thread
+        self._lock = threading.Lock()
+        # Processes sharing the database wait up to `timeout` seconds for each other's writes
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+
+        # Last settings known to be on disk, used to compute row-level diffs
+        self._saved = None
+
+        created = self._migrate()
+
+        # Guards the read connection and self._saved; never held while waiting for a write
+        self._read_lock = threading.Lock()
+        self._reader = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+        self._reader.row_factory = sqlite3.Row
+        self._reader.execute("PRAGMA query_only=ON")
+
+        if created and import_from is not None:
+            self.import_json(import_from)
+
+    def _migrate(self):
+        """Apply pending migrations. Returns True if the database was new."""
+        with self._lock:
+            created = False
+            while True:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    # Read under the write lock, so processes starting together
+                    # don't apply the same migration twice
+                    current = self._conn.execute("PRAGMA user_version").fetchone()[0]
+                    if current >= len(MIGRATIONS):
+                        self._conn.execute("COMMIT")
+                        break
+                    for statement in MIGRATIONS[current]:
+                        self._conn.execute(statement)
+                    self._conn.execute(f"PRAGMA user_version = {current + 1}")
+                    self._conn.execute("COMMIT")
+                except Exception:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                log.info("Applied storage migration %d", current + 1)
+                created = created or current == 0
+            return created
+
+    def import_json(self, json_path):
+        """One-shot import of an existing settings.json into the database."""
+        json_path = Path(json_path)
+        if not json_path.exists():
+            return False
+
+        try:
+            with open(json_path, 'r') as f:
+                settings = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            log.error("Error importing %s: %s", json_path.name, e)
+            return False
+
+        with self._read_lock:
+            self._saved = None
+        self.save(normalize_settings(settings))
+        log.info("Imported settings from %s", json_path.name)
+        return True
+
+    def version(self):
+        """Return a counter that changes when another connection (or the writer) commits."""
+        with self._read_lock:
+            return self._reader.execute("PRAGMA data_version").fetchone()[0]
+
+    def read(self):
+        """Read settings changed by another connection. Transactions are never seen half-applied."""
+        return self.load()
+
+    def load(self):
+        """Read settings for all guilds from the database."""
+        with self._read_lock:
+            # One read transaction, so all tables come from the same commit
+            self._reader.execute("BEGIN")
+            try:
+                rows = self._reader.execute("SELECT * FROM guild_config").fetchall()
+                forums = self._reader.execute(
+                    "SELECT forum_id, guild_id, digest_minutes, webhook_username, webhook_avatar_url "
+                    "FROM monitored_forums ORDER BY forum_id"
+                ).fetchall()
+                routes = self._reader.execute(
+                    "SELECT * FROM notification_routes ORDER BY guild_id, position"
+                ).fetchall()
+            finally:
+                self._reader.execute("COMMIT")
+            settings = self._build_settings(rows, forums, routes)
+            self._saved = copy.deepcopy(settings)
+        return settings
+
+    @staticmethod
+    def _build_settings(rows, forums, routes):
+        """Assemble the settings dict from guild, forum and route rows."""
+        settings = copy.deepcopy(DEFAULT_SETTINGS)
+        for row in rows:
+            guild_settings = copy.deepcopy(DEFAULT_GUILD_SETTINGS)
+            for column in CONFIG_COLUMNS:
+                guild_settings[column] = row[column]
+            settings['guilds'][str(row['guild_id'])] = guild_settings
+
+        for forum in forums:
+            guild_settings = settings['guilds'][str(forum['guild_id'])]
+            guild_settings['monitored_forums'].append(forum['forum_id'])
+            if forum['digest_minutes']:
+                guild_settings['digest_forums'][str(forum['forum_id'])] = forum['digest_minutes']
+            if forum['webhook_username'] or forum['webhook_avatar_url']:
+                guild_settings['forum_identities'][str(forum['forum_id'])] = {
+                    'username': forum['webhook_username'],
+                    'avatar_url': forum['webhook_avatar_url']
+                }
+
+        for route in routes:
+            settings['guilds'][str(route['guild_id'])]['routes'].append(
+                {column: route[column] for column in ROUTE_COLUMNS}
+            )
+        return settings
+
+    def save(self, settings):
+        """Write only the guild and forum rows that changed since the last load/save."""
+        with self._read_lock:
+            saved_guilds = self._saved['guilds'] if self._saved else {}
+        guilds = settings['guilds']
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Removed guilds; their forums go with them (ON DELETE CASCADE)
+                self._conn.executemany(
+                    "DELETE FROM guild_config WHERE guild_id = ?",
+                    [(int(key),) for key in saved_guilds.keys() - guilds.keys()]
+                )
+
+                for key, guild_settings in guilds.items():
+                    guild_id = int(key)
+                    saved = saved_guilds.get(key)
+                    if saved is None:
+                        self._conn.execute(
+                            "INSERT OR IGNORE INTO guild_config (guild_id) VALUES (?)", (guild_id,)
+                        )
+                        saved = {'monitored_forums': [], 'digest_forums': {}, 'routes': [], 'forum_identities': {}}
+
+                    for column in CONFIG_COLUMNS:
+                        if column in guild_settings and guild_settings[column] != saved.get(column):
+                            self._conn.execute(
+                                f"UPDATE guild_config SET {column} = ? WHERE guild_id = ?",
+                                (guild_settings[column], guild_id)
+                            )
+
+                    old_forums = set(saved['monitored_forums'])
+                    new_forums = set(guild_settings['monitored_forums'])
+                    self._conn.executemany(
+                        "DELETE FROM monitored_forums WHERE forum_id = ? AND guild_id = ?",
+                        [(forum_id, guild_id) for forum_id in old_forums - new_forums]
+                    )
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO monitored_forums (forum_id, guild_id) VALUES (?, ?)",
+                        [(forum_id, guild_id) for forum_id in new_forums - old_forums]
+                    )
+
+                    old_digests = saved.get('digest_forums', {})
+                    new_digests = guild_settings.get('digest_forums', {})
+                    self._conn.executemany(
+                        "UPDATE monitored_forums SET digest_minutes = ? WHERE forum_id = ? AND guild_id = ?",
+                        [
+                            (new_digests.get(key, 0), int(key), guild_id)
+                            for key in old_digests.keys() | new_digests.keys()
+                            if new_digests.get(key, 0) != old_digests.get(key, 0)
+                        ]
+                    )
+
+                    old_identities = saved.get('forum_identities', {})
+                    new_identities = guild_settings.get('forum_identities', {})
+                    identity_updates = []
+                    for key in old_identities.keys() | new_identities.keys():
+                        identity = new_identities.get(key)
+                        if identity != old_identities.get(key):
+                            identity = identity or {}
+                            identity_updates.append(
+                                (identity.get('username'), identity.get('avatar_url'), int(key), guild_id)
+                            )
+                    self._conn.executemany(
+                        "UPDATE monitored_forums SET webhook_username = ?, webhook_avatar_url = ? "
+                        "WHERE forum_id = ? AND guild_id = ?",
+                        identity_updates
+                    )
+
+                    # Rules are few and ordered; rewrite them all if any changed
+                    routes = guild_settings.get('routes', [])
+                    if routes != saved.get('routes', []):
+                        self._conn.execute("DELETE FROM notification_routes WHERE guild_id = ?", (guild_id,))
+                        self._conn.executemany(
+                            "INSERT INTO notification_routes "
+                            "(guild_id, position, forum_id, tag_id, role_id, channel_id) VALUES (?, ?, ?, ?, ?, ?)",
+                            [
+                                (guild_id, position) + tuple(route[column] for column in ROUTE_COLUMNS)
+                                for position, route in enumerate(routes)
+                            ]
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        # After the commit, so a load() racing with this save can't leave an older snapshot
+        with self._read_lock:
+            self._saved = copy.deepcopy(settings)
+
+    def load_records(self, kind):
+        """Return all records of a kind as {key: value}."""
+        with self._read_lock:
+            rows = self._reader.execute(
+                "SELECT key, data FROM records WHERE kind = ?", (kind,)
+            ).fetchall()
+        return {row['key']: json.loads(row['data']) for row in rows}
+
+    def apply_records(self, changes):
+        """Apply (kind, key, value) changes in one transaction; value None deletes."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Apply in order so a later change to the same key wins
+                for kind, key, value in changes:
+                    if value is None:
+                        self._conn.execute(
+                            "DELETE FROM records WHERE kind = ? AND key = ?", (kind, key)
+                        )
+                    else:
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO records (kind, key, data) VALUES (?, ?, ?)",
+                            (kind, key, json.dumps(value))
+                        )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        """Close the database connections."""
+        with self._read_lock:
+            self._reader.close()
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == '__main__':
+    # python -m utils.sqlite_store [settings.json]
+    # Import a settings.json into the database, e.g. after switching backends
+    import sys
+    from utils.storage import DATABASE_FILE, SETTINGS_FILE
+
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else SETTINGS_FILE
+    storage = SQLiteStorage(DATABASE_FILE)
+    if not storage.import_json(source):
+        print(f"Nothing imported from {source}")
+    storage.close()
@@ -1,42 +1,428 @@
+import asyncio
+import copy
 import json
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+log = logging.getLogger(__name__)
+
 SETTINGS_FILE = Path(__file__).parent.parent / "data" / "settings.json"
+DATABASE_FILE = Path(__file__).parent.parent / "data" / "settings.db"
 
-DEFAULT_SETTINGS = {
+# Storage engine: "json" (default) or "sqlite"
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'json').lower()
+
+# Seconds to wait after a change before writing, so bursts of config
+# changes are coalesced into a single write
+SAVE_DELAY = 1.0
+
+# Per-guild settings, stored under settings["guilds"][str(guild_id)]
+DEFAULT_GUILD_SETTINGS = {
     "notification_channel_id": None,
     "error_channel_id": None,
     "monitored_forums": [],
     "embed_color": "#2f3136",
-    "preview_length": 100
+    "preview_length": 100,
+    "shrink_delay": 300,
+    # str(forum_id) -> minutes between digests, for forums in digest mode
+    "digest_forums": {},
+    # Routing rules, in order: {"forum_id", "tag_id", "role_id", "channel_id"}.
+    # Posts matching any rule go to the matching channels instead of
+    # notification_channel_id; tag_id and role_id may be None (any).
+    "routes": [],
+    # str(forum_id) -> {"username", "avatar_url"} used for webhook delivery
+    "forum_identities": {}
 }
 
+DEFAULT_SETTINGS = {
+    "guilds": {}
+}
 
-def load_settings():
-    """Load settings from JSON file. Creates file with defaults if missing or corrupted."""
-    try:
-        if SETTINGS_FILE.exists():
-            with open(SETTINGS_FILE, 'r') as f:
-                settings = json.load(f)
-                # Ensure all default keys exist
-                for key in DEFAULT_SETTINGS:
-                    if key not in settings:
-                        settings[key] = DEFAULT_SETTINGS[key]
+# Guild key used for settings saved before settings were per-guild, until
+# claim_legacy_settings() assigns them to a real guild
+LEGACY_GUILD_KEY = "0"
+
+# Process-wide settings cache. load_settings() hands out this object itself,
+# so callers that mutate it must call save_settings() to persist the change.
+_backend = None
+_settings = None
+_settings_version = None
+# Bumped whenever the cached settings change, so consumers can rebuild
+# anything derived from them (e.g. lookup indexes)
+_generation = 0
+
+# Pending debounced write, and the single thread all writes run on so they
+# never interleave
+_dirty = False
+_save_task = None
+# Record changes waiting to be written: (kind, key, value), value None deletes
+_pending_records = []
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="settings-writer")
+
+
+def _atomic_write_json(path, data, indent=None):
+    """Write JSON to a temp file, fsync it and rename it over path.
+
+    A crash mid-write leaves either the old or the new file on disk.
+    """
+    path = Path(path)
+    os.makedirs(path.parent, exist_ok=True)
+    tmp_file = path.with_name(path.name + ".tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, path)
+
+    # Persist the rename itself
+    if hasattr(os, 'O_DIRECTORY'):
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+
+class JSONStorage:
+    """Stores settings as a single JSON document.
+
+    Records are kept in one JSON file per kind next to the settings file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        # kind -> {key: value}, loaded on first use
+        self._records = {}
+
+    def version(self):
+        """Return the file mtime, or None if it doesn't exist."""
+        try:
+            return self.path.stat().st_mtime_ns
+        except OSError:
+            return None
+
+    def read(self):
+        """Read settings from the JSON file, raising if it is missing or invalid."""
+        with open(self.path, 'r') as f:
+            return normalize_settings(json.load(f))
+
+    def load(self):
+        """Read settings from JSON file. Creates file with defaults if missing or corrupted."""
+        try:
+            if self.path.exists():
+                return self.read()
+            else:
+                # File doesn't exist, create with defaults
+                settings = copy.deepcopy(DEFAULT_SETTINGS)
+                self.save(settings)
                 return settings
+        except (json.JSONDecodeError, Exception) as e:
+            # File corrupted or other error, keep a copy and recreate with defaults
+            backup = self.path.with_name(self.path.name + ".corrupt")
+            log.error("Error loading settings: %s. Moved file to %s, recreating with defaults.", e, backup.name)
+            try:
+                os.replace(self.path, backup)
+            except OSError:
+                pass
+            settings = copy.deepcopy(DEFAULT_SETTINGS)
+            self.save(settings)
+            return settings
+
+    def save(self, settings):
+        """Atomically write settings to JSON file."""
+        _atomic_write_json(self.path, settings, indent=2)
+
+    def _records_for(self, kind):
+        """Return the cached records of a kind, reading its file on first use."""
+        if kind not in self._records:
+            records = {}
+            path = self.path.with_name(f"{kind}.json")
+            try:
+                with open(path, 'r') as f:
+                    records = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (json.JSONDecodeError, OSError) as e:
+                log.error("Error loading %s: %s. Starting empty.", path.name, e)
+            self._records[kind] = records
+        return self._records[kind]
+
+    def load_records(self, kind):
+        """Return a copy of all records of a kind as {key: value}."""
+        return copy.deepcopy(self._records_for(kind))
+
+    def apply_records(self, changes):
+        """Apply (kind, key, value) changes, rewriting each touched file once."""
+        touched = set()
+        for kind, key, value in changes:
+            records = self._records_for(kind)
+            if value is None:
+                records.pop(key, None)
+            else:
+                records[key] = value
+            touched.add(kind)
+
+        for kind in touched:
+            _atomic_write_json(self.path.with_name(f"{kind}.json"), self._records[kind])
+
+
+def normalize_settings(settings):
+    """Upgrade pre-guild settings and fill in missing default keys."""
+    if 'guilds' not in settings:
+        # Flat settings from before per-guild support
+        settings = {"guilds": {LEGACY_GUILD_KEY: settings}}
+
+    for key in DEFAULT_SETTINGS:
+        if key not in settings:
+            settings[key] = copy.deepcopy(DEFAULT_SETTINGS[key])
+
+    for guild_settings in settings['guilds'].values():
+        for key in DEFAULT_GUILD_SETTINGS:
+            if key not in guild_settings:
+                guild_settings[key] = copy.deepcopy(DEFAULT_GUILD_SETTINGS[key])
+    return settings
+
+
+def find_guild_settings(settings, guild_id, legacy=False):
+    """Return the settings for a guild without adding an entry for it.
+
+    Guilds without their own settings get a copy of the defaults. Treat the
+    result as read-only; use get_guild_settings() for settings that are
+    about to be changed.
+
+    Args:
+        legacy: Fall back to the legacy settings while they are unclaimed.
+            Only for handling events, which may arrive before
+            claim_legacy_settings() runs; never for commands, which would
+            show or use another guild's settings.
+    """
+    guilds = settings['guilds']
+    guild_settings = guilds.get(str(guild_id))
+    if guild_settings is None and legacy:
+        guild_settings = guilds.get(LEGACY_GUILD_KEY)
+    if guild_settings is None:
+        guild_settings = copy.deepcopy(DEFAULT_GUILD_SETTINGS)
+    return guild_settings
+
+
+def get_guild_settings(settings, guild_id):
+    """Return the settings for a guild, adding defaults if it has none yet.
+
+    The new entry is part of the cached settings, so only call this when
+    saving; an entry for the guild keeps claim_legacy_settings() from
+    moving the legacy settings to it.
+    """
+    guilds = settings['guilds']
+    key = str(guild_id)
+    if key not in guilds:
+        guilds[key] = copy.deepcopy(DEFAULT_GUILD_SETTINGS)
+    return guilds[key]
+
+
+def claim_legacy_settings(guild_id):
+    """Move settings saved before per-guild support to the given guild.
+
+    Does nothing if there are no legacy settings or the guild already has
+    its own settings. Returns True if settings were moved.
+    """
+    settings = load_settings()
+    guilds = settings['guilds']
+    key = str(guild_id)
+    if LEGACY_GUILD_KEY not in guilds or key in guilds:
+        return False
+
+    guilds[key] = guilds.pop(LEGACY_GUILD_KEY)
+    save_settings(settings)
+    log.info("Moved legacy settings to guild", extra={'guild_id': guild_id})
+    return True
+
+
+def get_settings_generation():
+    """Return a counter that changes whenever the cached settings change."""
+    return _generation
+
+
+def get_backend():
+    """Return the configured storage backend, creating it on first use."""
+    global _backend
+    if _backend is None:
+        if STORAGE_BACKEND == 'sqlite':
+            from utils.sqlite_store import SQLiteStorage
+            _backend = SQLiteStorage(DATABASE_FILE, import_from=SETTINGS_FILE)
+        elif STORAGE_BACKEND == 'json':
+            _backend = JSONStorage(SETTINGS_FILE)
         else:
-            # File doesn't exist, create with defaults
-            save_settings(DEFAULT_SETTINGS)
-            return DEFAULT_SETTINGS.copy()
-    except (json.JSONDecodeError, Exception) as e:
-        # File corrupted or other error, recreate with defaults
-        print(f"Error loading settings: {e}. Recreating with defaults.")
-        save_settings(DEFAULT_SETTINGS)
-        return DEFAULT_SETTINGS.copy()
+            raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}' (expected 'json' or 'sqlite')")
+    return _backend
+
+
+def load_settings(revalidate=False):
+    """Return the cached settings, reading them from storage on first use.
+
+    Args:
+        revalidate: Check whether storage was changed outside the bot (file
+            mtime or database version) and reload if so.
+    """
+    global _settings, _settings_version, _generation
+    backend = get_backend()
+    if _settings is None:
+        _settings = backend.load()
+        _settings_version = backend.version()
+        _generation += 1
+        return _settings
+
+    # Never revalidate over changes that haven't been written yet
+    if revalidate and not _dirty:
+        version = backend.version()
+        if version != _settings_version:
+            # Taken before reading, so an edit made while reading is picked up next time
+            _settings_version = version
+            try:
+                settings = backend.read()
+            except Exception as e:
+                # E.g. an editor saving in place; keep the current settings until the next change
+                log.warning("Ignoring unreadable settings change: %s", e)
+            else:
+                _settings = settings
+                _generation += 1
+                log.info("Reloaded settings changed outside the bot", extra={'event': 'settings_reloaded'})
+    return _settings
 
 
 def save_settings(settings):
-    """Save settings to JSON file."""
-    os.makedirs(SETTINGS_FILE.parent, exist_ok=True)
-    with open(SETTINGS_FILE, 'w') as f:
-        json.dump(settings, f, indent=2)
+    """Update the in-memory cache and persist settings.
+
+    Inside a running event loop the write is debounced by SAVE_DELAY and
+    performed on a background thread, so callers never block on disk I/O.
+    Use flush_storage() to wait for pending writes. Without a running loop
+    settings are written immediately.
+    """
+    global _settings, _dirty, _generation
+    _settings = settings
+    _generation += 1
+
+    _dirty = True
+    if not _schedule_write():
+        _dirty = False
+        _write_snapshot(settings)
+
+
+def load_records(kind):
+    """Return all stored records of a kind as {key: value}. Keys are strings.
+
+    Reads from storage directly; meant for startup, not per-event lookups.
+    """
+    return get_backend().load_records(kind)
+
+
+def put_record(kind, key, value):
+    """Store a JSON-serializable record, written in the background like settings."""
+    _queue_record_change(kind, str(key), value)
+
+
+def delete_record(kind, key):
+    """Remove a stored record, written in the background like settings."""
+    _queue_record_change(kind, str(key), None)
+
+
+def _queue_record_change(kind, key, value):
+    """Queue a record change for the next debounced write."""
+    _pending_records.append((kind, key, value))
+    if not _schedule_write():
+        _write_records(_take_pending_records())
+
+
+def _take_pending_records():
+    """Return and clear the queued record changes."""
+    global _pending_records
+    changes, _pending_records = _pending_records, []
+    return changes
+
+
+def _schedule_write():
+    """Start a debounced write unless one is pending. Returns False without a running loop."""
+    global _save_task
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+    if _save_task is None or _save_task.done():
+        _save_task = loop.create_task(_delayed_save())
+    return True
+
+
+async def _delayed_save():
+    """Wait out the debounce window, then write the latest changes.
+
+    Changes made while a write is running find this task still pending and
+    don't start another, so keep writing until nothing is left. A failed
+    settings write stays pending for the next save or flush instead.
+    """
+    while True:
+        await asyncio.sleep(SAVE_DELAY)
+        if not await _write_pending() or not (_dirty or _pending_records):
+            return
+
+
+async def _write_pending():
+    """Hand changed settings and queued record changes to the writer thread.
+
+    Returns False if the settings write failed.
+    """
+    global _dirty
+    loop = asyncio.get_running_loop()
+    saved = True
+
+    if _dirty:
+        # Snapshot on the loop so the writer never sees a half-applied change
+        snapshot = copy.deepcopy(_settings)
+        _dirty = False
+        saved = await loop.run_in_executor(_writer, _write_snapshot, snapshot)
+
+    if _pending_records:
+        await loop.run_in_executor(_writer, _write_records, _take_pending_records())
+    return saved
+
+
+def _write_snapshot(snapshot):
+    """Write a settings snapshot. Runs on the writer thread. Returns False if it failed."""
+    global _settings_version, _dirty
+    backend = get_backend()
+    try:
+        backend.save(snapshot)
+        _settings_version = backend.version()
+    except Exception:
+        # Leave the change pending so the next save or flush retries it
+        _dirty = True
+        log.exception("Error saving settings")
+        return False
+    return True
+
+
+def _write_records(changes):
+    """Write record changes. Runs on the writer thread."""
+    try:
+        get_backend().apply_records(changes)
+    except Exception:
+        log.exception("Error saving %d record change(s)", len(changes))
+
+
+async def flush_storage():
+    """Write pending settings and record changes now and wait for the writes to finish."""
+    global _save_task
+    task = _save_task
+    _save_task = None
+    if task is not None and not task.done() and task is not asyncio.current_task():
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    # Writes run in order on one thread, so this waits for any in-flight write
+    await asyncio.get_running_loop().run_in_executor(_writer, lambda: None)
+    await _write_pending()
+
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import random
+import time
+
+import aiohttp
+import discord
+
+from utils.storage import delete_record, load_records, put_record
+
+log = logging.getLogger(__name__)
+
+# Webhook usernames are limited to 80 characters
+MAX_USERNAME_LENGTH = 80
+# Errors after which an edit or delete is tried again
+RETRY_ERRORS = (discord.DiscordServerError, aiohttp.ClientError, asyncio.TimeoutError)
+# Errors raised before a request went out, so even a send can be tried again
+CONNECT_ERRORS = (aiohttp.ClientConnectorError,)
+
+
+class WebhookSender:
+    """Delivers notifications through one bot-created webhook per channel.
+
+    Webhook sends don't count against the bot token's rate limits and can
+    use a custom username and avatar. All webhooks share one pooled HTTP
+    session. Webhooks are found or created on first use and persisted as
+    records, so restarts don't need to look them up again.
+
+    Channels where a webhook can't be used (e.g. no Manage Webhooks
+    permission) fall back to sending with the bot token, and are retried
+    after `fallback_ttl` seconds.
+    """
+
+    RECORD_KIND = "webhooks"
+
+    def __init__(self, bot, name="Forum Notifier", pool_size=20, retries=3, fallback_ttl=3600):
+        """
+        Args:
+            bot: The bot, used to create webhooks and resolve sent messages.
+            name: Name of webhooks created by the bot.
+            pool_size: Max simultaneous connections of the shared session.
+            retries: Retries of an edit or delete after connection or server
+                errors, and of a send when the connection couldn't be made.
+            fallback_ttl: Seconds to use the bot token for a channel after its
+                webhook couldn't be created.
+        """
+        self.bot = bot
+        self.name = name
+        self.pool_size = pool_size
+        self.retries = retries
+        self.fallback_ttl = fallback_ttl
+        self.session = None
+        # channel_id -> discord.Webhook
+        self._webhooks = {}
+        # channel_id -> monotonic time until which the bot token is used
+        self._unavailable = {}
+        self._locks = {}
+        self.stats = {'webhook': 0, 'fallback': 0, 'retries': 0, 'created': 0}
+
+    async def start(self):
+        """Open the shared session and load persisted webhooks."""
+        self.session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=self.pool_size),
+            timeout=aiohttp.ClientTimeout(total=30)
+        )
+        for key, (webhook_id, token, guild_id) in load_records(self.RECORD_KIND).items():
+            self._webhooks[int(key)] = self._partial(webhook_id, token, int(key), guild_id)
+
+    async def close(self):
+        """Close the shared session."""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def _partial(self, webhook_id, token, channel_id, guild_id):
+        """Build a webhook on the shared session from stored IDs."""
+        webhook = discord.Webhook.partial(webhook_id, token, session=self.session, client=self.bot)
+        # With these and the client's state, sent messages resolve their channel and guild
+        webhook.channel_id = channel_id
+        webhook.guild_id = guild_id
+        return webhook
+
+    async def send(self, channel, embeds, view=discord.utils.MISSING, identity=None):
+        """Send a message to a channel through its webhook, or with the bot token.
+
+        Args:
+            channel: Destination text channel.
+            embeds: Embeds of the message.
+            view: Optional view of link buttons.
+            identity: Optional (username, avatar_url) to post as.
+
+        Returns:
+            The sent message.
+        """
+        webhook = await self._get_webhook(channel)
+        if webhook is not None:
+            username, avatar_url = identity or (None, None)
+            try:
+                message = await self._with_retries(lambda: webhook.send(
+                    embeds=embeds,
+                    view=view,
+                    username=username[:MAX_USERNAME_LENGTH] if username else discord.utils.MISSING,
+                    avatar_url=avatar_url or self.bot.user.display_avatar.url,
+                    wait=True
+                ), idempotent=False)
+                self.stats['webhook'] += 1
+                return message
+            except discord.NotFound:
+                # Webhook deleted; a new one is created for the next message
+                self._forget(channel.id)
+            except discord.Forbidden:
+                self._mark_unavailable(channel.id)
+
+        self.stats['fallback'] += 1
+        return await self._with_retries(lambda: channel.send(embeds=embeds, view=view), idempotent=False)
+
+    async def edit(self, channel_id: int, message_id: int, **fields):
+        """Edit a message sent through a channel's webhook.
+
+        Raises:
+            LookupError: No webhook is known for the channel.
+        """
+        webhook = self._webhooks.get(channel_id)
+        if webhook is None:
+            raise LookupError(f"No webhook for channel {channel_id}")
+        return await self._with_retries(lambda: webhook.edit_message(message_id, **fields))
+
+    async def delete(self, channel_id: int, message_id: int):
+        """Delete a message sent through a channel's webhook.
+
+        Raises:
+            LookupError: No webhook is known for the channel.
+        """
+        webhook = self._webhooks.get(channel_id)
+        if webhook is None:
+            raise LookupError(f"No webhook for channel {channel_id}")
+        await self._with_retries(lambda: webhook.delete_message(message_id))
+
+    async def _with_retries(self, request, idempotent=True):
+        """Await request(), retrying connection and server errors with exponential backoff.
+
+        Requests that aren't idempotent (sends) are only retried when the
+        connection couldn't be made: after a timeout or a server error the
+        message may already have been posted, and a retry would post it twice.
+        Rate limits (429) are already waited out by discord.py.
+        """
+        retry_errors = RETRY_ERRORS if idempotent else CONNECT_ERRORS
+        for attempt in range(self.retries + 1):
+            try:
+                return await request()
+            except retry_errors:
+                if attempt == self.retries:
+                    raise
+                self.stats['retries'] += 1
+                # 1s, 2s, 4s... with jitter so retries from a burst don't line up
+                await asyncio.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+
+    async def _get_webhook(self, channel):
+        """Return the channel's webhook, finding or creating it, or None to use the bot token."""
+        webhook = self._webhooks.get(channel.id)
+        if webhook is not None:
+            return webhook
+
+        unavailable_until = self._unavailable.get(channel.id)
+        if unavailable_until is not None:
+            if time.monotonic() < unavailable_until:
+                return None
+            del self._unavailable[channel.id]
+
+        lock = self._locks.setdefault(channel.id, asyncio.Lock())
+        async with lock:
+            webhook = self._webhooks.get(channel.id)
+            if webhook is not None:
+                return webhook
+            try:
+                webhook = await self._find_or_create(channel)
+            except Exception as e:
+                log.warning(
+                    "Webhook unavailable, sending with bot token: %s", e,
+                    extra={'guild_id': channel.guild.id, 'channel_id': channel.id}
+                )
+                self._mark_unavailable(channel.id)
+                return None
+
+        self._webhooks[channel.id] = webhook
+        put_record(self.RECORD_KIND, channel.id, [webhook.id, webhook.token, channel.guild.id])
+        return webhook
+
+    async def _find_or_create(self, channel):
+        """Reuse a webhook this bot created in the channel, or create one."""
+        for webhook in await channel.webhooks():
+            if webhook.user and webhook.user.id == self.bot.user.id and webhook.token:
+                return self._partial(webhook.id, webhook.token, channel.id, channel.guild.id)
+
+        webhook = await channel.create_webhook(name=self.name, reason="Forum notification delivery")
+        self.stats['created'] += 1
+        return self._partial(webhook.id, webhook.token, channel.id, channel.guild.id)
+
+    def _forget(self, channel_id: int):
+        if self._webhooks.pop(channel_id, None) is not None:
+            delete_record(self.RECORD_KIND, channel_id)
+
+    def _mark_unavailable(self, channel_id: int):
+        self._forget(channel_id)
+        self._unavailable[channel_id] = time.monotonic() + self.fallback_ttl
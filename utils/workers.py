@@ -0,0 +1,104 @@
+import asyncio
+import itertools
+import logging
+
+log = logging.getLogger(__name__)
+
+# Job priorities, lowest value first
+PRIORITY_NOTIFICATION = 0
+PRIORITY_SHRINK = 1
+PRIORITY_ERROR_REPORT = 2
+
+
+class WorkPool:
+    """Runs coroutine jobs on a fixed number of workers, highest priority first.
+
+    Jobs wait in a bounded queue, so the number of jobs in flight (and the
+    REST calls they make) is capped however many events arrive at once.
+    submit() fails fast when the queue is full so callers can degrade;
+    run() waits for room instead.
+    """
+
+    def __init__(self, workers=10, max_queue=500):
+        """
+        Args:
+            workers: Jobs that may run at the same time.
+            max_queue: Jobs that may wait for a worker.
+        """
+        self.worker_count = workers
+        self.max_queue = max_queue
+        self._queue = asyncio.PriorityQueue(maxsize=max_queue)
+        # Keeps jobs of equal priority in submission order
+        self._sequence = itertools.count()
+        self._tasks = []
+        self.stats = {'completed': 0, 'failed': 0, 'rejected': 0}
+
+    def depth(self) -> int:
+        """Return the number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def start(self):
+        """Start the workers."""
+        if self._tasks:
+            return
+        for _ in range(self.worker_count):
+            self._tasks.append(asyncio.create_task(self._work()))
+
+    async def stop(self, timeout=10.0):
+        """Run the queued jobs (for up to `timeout` seconds), then stop the workers."""
+        if self._tasks and not self._queue.empty():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                log.warning("Stopping work pool with %d job(s) still queued", self.depth())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        while not self._queue.empty():
+            *_, future = self._queue.get_nowait()
+            future.cancel()
+
+    def submit(self, priority: int, func, *args) -> asyncio.Future:
+        """Queue func(*args) and return a future for its result.
+
+        Raises:
+            asyncio.QueueFull: The queue is full; nothing was queued.
+        """
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((priority, next(self._sequence), func, args, future))
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            raise
+        return future
+
+    async def run(self, priority: int, func, *args):
+        """Queue func(*args), waiting while the queue is full, and return its result."""
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((priority, next(self._sequence), func, args, future))
+        return await future
+
+    async def _work(self):
+        """Run queued jobs one at a time."""
+        while True:
+            _, _, func, args, future = await self._queue.get()
+            try:
+                if future.cancelled():
+                    continue
+                try:
+                    result = await func(*args)
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    self.stats['failed'] += 1
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    self.stats['completed'] += 1
+                    if not future.done():
+                        future.set_result(result)
+            finally:
+                self._queue.task_done()